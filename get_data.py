@@ -1,5 +1,6 @@
 import os
 import sys
+import json
 import yaml
 import numpy as np
 import argparse
@@ -11,8 +12,11 @@ logging.basicConfig(
     datefmt="%d-%m-%Y %H:%M:%S",
     stream=sys.stdout
 )
-from modules.data_generation.data_generation_dynamic_fixed_material import DynamicFixedMaterialProblem
+from modules.data_generation.data_generation_dynamic_fixed_material import dynamic_problem_from_params
 from modules.data_generation.data_generation_kelvin import KelvinsProblemDeterministic
+from modules.data_generation.green_cache import GreenFunctionCache
+from modules.data_generation import benchmark
+from modules.data_processing.preprocessing import convert_npz_to_npy_dir, reduced_dtype
 
 logger = logging.getLogger(__name__)
 
@@ -21,8 +25,28 @@ def gen_data(config_path: str):
     parser = argparse.ArgumentParser()
 
     parser.add_argument("--problem", type=str, help="Generate data for given problem")
+    parser.add_argument("--workers", type=int, default=1, help="Number of parallel workers for the dynamic problem's integration")
+    parser.add_argument("--pool", type=str, default="process", choices=["thread", "process"], help="Worker pool type used when --workers > 1")
+    parser.add_argument("--shard-size", type=int, default=None, help="Save the dynamic problem in resumable shards of this many frequencies")
+    parser.add_argument("--point-timeout", type=float, default=None, help="Seconds allowed per point evaluation in sharded runs")
+    parser.add_argument("--retries", type=int, default=1, help="Retries for points that timed out or failed in sharded runs")
+    parser.add_argument("--chunk-size", type=int, default=None, help="Compute Kelvin samples in blocks of this size into a memory-mapped target")
+    parser.add_argument("--dtype", type=str, default=None, choices=["float64", "float32", "float16"], help="Storage precision of the displacements (complex64 for float32 dynamic data). With --convert, targets are cast to it and a quantization report is written")
+    parser.add_argument("--storage", type=str, default="full", choices=["full", "factorized"], help="Save every Kelvin field, or the prefactors and nu-dependent kernels only")
+    parser.add_argument("--cache", type=str, default=None, help="SQLite file caching evaluated Green function points across runs")
+    parser.add_argument("--cache-max-entries", type=int, default=10_000_000, help="Maximum number of cached points before LRU eviction")
+    parser.add_argument("--convert", type=str, default=None, help="Convert an existing .npz dataset into a memory-mappable directory of .npy files and exit")
+    parser.add_argument("--benchmark", "--estimate", action="store_true", help="Time a sample of the kernel and estimate the cost of the configured run instead of generating data")
+    parser.add_argument("--benchmark-workers", type=int, nargs="+", default=[1, 2, 4], help="Worker counts timed for the dynamic problem")
+    parser.add_argument("--benchmark-chunks", type=int, nargs="+", default=[1, 8, 64], help="Chunk sizes timed for the Kelvin problem")
+    parser.add_argument("--benchmark-points", type=int, default=64, help="Approximate number of points timed per worker count (dynamic problem)")
+    parser.add_argument("--benchmark-output", type=str, default=None, help="JSON file the benchmark results are written to (printed if not given)")
     args = parser.parse_args()
 
+    if args.convert:
+        convert_npz_to_npy_dir(args.convert, dtype=args.dtype)
+        return
+
     problem = args.problem.lower()
 
     with open(config_path) as file:
@@ -35,35 +59,26 @@ def gen_data(config_path: str):
     # --------- Grouping parameters -------------
 
     if problem == "dynamic_fixed_material":
-        data_size = (p["N"], 
-                     p["N_R"], 
-                     p["N_Z"])
-        load_params = ((p["OMEGA_MAX"]), # Gotta fix this, should evaluate
-                       (p["OMEGA_MIN"]), 
-                       (p["LOAD"]), 
-                       (p["Z_SOURCE"]), 
-                       (p["L_SOURCE"]), 
-                       (p["R_SOURCE"]))
-        mesh_params = ((p["R_MIN"], 
-                        p["R_MAX"], 
-                        p["Z_MIN"], 
-                        p["Z_MAX"]))
-        problem_setup = (p['COMPONENT'], 
-                         p['LOADTYPE'], 
-                         p['BVPTYPE'])
-        material_params = ((p["E"], 
-                            p["NU"], 
-                            p["DAMP"], 
-                            p["DENS"]))
-
-        influence_functions = DynamicFixedMaterialProblem(
-            data_size,
-            material_params,
-            load_params,
-            mesh_params,
-            problem_setup,
+        influence_functions = dynamic_problem_from_params(
+            p,
+            workers=args.workers,
+            pool=args.pool,
+            shard_size=args.shard_size,
+            point_timeout=args.point_timeout,
+            retries=args.retries,
+            cache=GreenFunctionCache(args.cache, max_entries=args.cache_max_entries) if args.cache else None,
+            dtype=reduced_dtype(complex, args.dtype or "float64")
         )
-        influence_functions.produce_samples(filename)
+        setups = [tuple(setup) for setup in p.get("SETUPS") or []]
+        if args.benchmark:
+            results = benchmark.benchmark_dynamic(influence_functions, args.benchmark_workers, args.benchmark_points)
+        elif setups:
+            stem, extension = os.path.splitext(filename)
+            filenames = [f"{stem}_c{component}_l{loadtype}_b{bvptype}{extension or '.npz'}"
+                         for component, loadtype, bvptype in setups]
+            influence_functions.produce_sweep(setups, filenames)
+        else:
+            influence_functions.produce_samples(filename)
 
     elif problem == "kelvin":
         data_size = (p["N_F_KELVIN"], 
@@ -91,12 +106,34 @@ def gen_data(config_path: str):
             material_params,
             load_params,
             mesh_params,
-            problem_setup
+            problem_setup,
+            chunk_size=args.chunk_size,
+            dtype=args.dtype or "float64",
+            storage=args.storage,
+            design=p.get("DESIGN_KELVIN", "grid"),
+            n_samples=p.get("N_SAMPLES_KELVIN")
         )
-        influence_functions.produce_samples(filename)
+        if args.benchmark:
+            results = benchmark.benchmark_kelvin(influence_functions, args.benchmark_chunks)
+        else:
+            influence_functions.produce_samples(filename)
 
     else:
         print("fatal error: not a valid problem.", file=sys.stderr)
+        return
+
+    if args.benchmark:
+        results['environment'] = benchmark.environment_info()
+        projection = results['projection']
+        logger.info(f"Estimated wall time: {projection['wall_time_s']:.1f} s, "
+                    f"peak memory: {projection['peak_memory_bytes'] / 2**20:.1f} MiB, "
+                    f"output size: {projection['output_bytes'] / 2**20:.1f} MiB")
+        if args.benchmark_output:
+            with open(args.benchmark_output, 'w') as file:
+                json.dump(results, file, indent=4)
+            logger.info(f"Benchmark results saved at {args.benchmark_output}")
+        else:
+            print(json.dumps(results, indent=4))
 
 if __name__ == "__main__":
 
@@ -0,0 +1,152 @@
+import time
+import platform
+import tracemalloc
+import numpy as np
+
+COMPLEX_BYTES = np.dtype(complex).itemsize
+FLOAT_BYTES = np.dtype(float).itemsize
+
+def _measure(function, *args):
+    """Runs 'function' once and returns (result, seconds, peak traced bytes)."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function(*args)
+    duration = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, duration, peak
+
+def benchmark_dynamic(problem, worker_counts=(1, 2, 4), n_points=64):
+    """
+    Times the Green-function integration on a random subset of the configured (delta, r, z) points
+    for several worker counts, and projects the cost of the full dataset.
+
+    Args:
+        problem (DynamicFixedMaterialProblem): Configured problem. Its cache is bypassed while timing.
+        worker_counts (tuple): Worker counts to time.
+        n_points (int): Approximate number of points evaluated for each worker count.
+
+    Returns:
+        dict: JSON-serializable benchmark results and projections.
+    """
+    N, n_r, n_z = problem.data_size
+    r_field, z_field = problem._get_coordinates()
+    _, delta = problem._get_input_functions()
+
+    n_freqs = min(N, 2 * max(worker_counts))
+    side = max(1, int(np.ceil(np.sqrt(n_points / n_freqs))))
+    freqs = np.random.choice(delta, n_freqs, replace=False)
+    r_sample = np.sort(np.random.choice(r_field, min(side, n_r), replace=False))
+    z_sample = np.sort(np.random.choice(z_field, min(side, n_z), replace=False))
+    sample_points = n_freqs * len(r_sample) * len(z_sample)
+
+    saved = problem.workers, problem.cache
+    problem.cache = None
+    runs = []
+    try:
+        for workers in worker_counts:
+            problem.workers = workers
+            _, seconds, _ = _measure(problem._influencefunc, freqs, r_sample, z_sample)
+            runs.append({'workers': workers,
+                         'points': sample_points,
+                         'seconds': seconds,
+                         'points_per_s': sample_points / seconds})
+    finally:
+        problem.workers, problem.cache = saved
+
+    best = max(runs, key=lambda run: run['points_per_s'])
+    total_points = N * n_r * n_z
+    output_bytes = total_points * problem.dtype.itemsize + (N + n_r + n_z) * FLOAT_BYTES
+    # Sharded runs also merge their shards into the full complex128 array before saving, and
+    # a reduced storage dtype adds its cast copy.
+    peak_memory_bytes = total_points * COMPLEX_BYTES
+    if problem.dtype != np.dtype(complex):
+        peak_memory_bytes += total_points * problem.dtype.itemsize
+    return {
+        'problem': 'dynamic_fixed_material',
+        'config': {'N': N, 'N_R': n_r, 'N_Z': n_z, 'dtype': problem.dtype.name},
+        'runs': runs,
+        'projection': {
+            'points': total_points,
+            'best_workers': best['workers'],
+            'wall_time_s': total_points / best['points_per_s'],
+            'peak_memory_bytes': peak_memory_bytes,
+            'output_bytes': output_bytes,
+        },
+    }
+
+def benchmark_kelvin(problem, chunk_sizes=(1, 8, 64), n_samples=None):
+    """
+    Times the vectorized Kelvin kernel on a subset of branch samples for several chunk sizes,
+    and projects the cost of the full dataset.
+
+    Args:
+        problem (KelvinsProblemDeterministic): Configured problem.
+        chunk_sizes (tuple): Chunk sizes to time.
+        n_samples (int, optional): Number of branch samples timed. Defaults to the largest chunk size.
+
+    Returns:
+        dict: JSON-serializable benchmark results and projections.
+    """
+    N_F, N_mu, N_nu, n_x, n_y, n_z = problem.data_size
+    N = problem.n_branch_samples
+    grid_points = n_x * n_y * n_z
+    x_field, y_field, z_field = problem._get_coordinates()
+    sensors = np.meshgrid(*problem._get_input_functions(), indexing="ij")
+    input_functions_meshgrid = np.column_stack([i.flatten() for i in sensors])
+    n_samples = min(len(input_functions_meshgrid), n_samples or max(chunk_sizes))
+    sample = input_functions_meshgrid[:n_samples]
+
+    itemsize = problem.dtype.itemsize
+    sample_bytes = grid_points * 3 * itemsize
+    grid_bytes = 3 * grid_points * 3 * FLOAT_BYTES  # coordinates, r terms and the geometric kernel
+
+    saved = problem.chunk_size
+    runs = []
+    try:
+        for chunk_size in chunk_sizes:
+            problem.chunk_size = chunk_size
+            _, seconds, peak = _measure(problem._influencefunc, sample, x_field, y_field, z_field)
+            block_bytes = min(chunk_size, N) * grid_points * 3 * FLOAT_BYTES
+            runs.append({'chunk_size': chunk_size,
+                         'samples': n_samples,
+                         'seconds': seconds,
+                         'samples_per_s': n_samples / seconds,
+                         'measured_peak_bytes': peak,
+                         'projected_wall_time_s': N * seconds / n_samples,
+                         # Chunked runs write into a memory-mapped file, so only the block stays resident.
+                         'projected_peak_memory_bytes': grid_bytes + block_bytes,
+                         'projected_peak_memory_in_memory_bytes': grid_bytes + block_bytes + N * sample_bytes})
+    finally:
+        problem.chunk_size = saved
+
+    best = max(runs, key=lambda run: run['samples_per_s'])
+    # Only chunked runs write into a memory map; without 'chunk_size' the whole target is held in memory.
+    peak_memory_bytes = best['projected_peak_memory_bytes' if problem.chunk_size else 'projected_peak_memory_in_memory_bytes']
+    if problem.storage == 'factorized':
+        field_bytes = N_F * N_mu * itemsize + N_nu * sample_bytes
+    else:
+        field_bytes = N * sample_bytes
+    return {
+        'problem': 'kelvin',
+        'config': {'N': N, 'N_X': n_x, 'N_Y': n_y, 'N_Z': n_z, 'dtype': problem.dtype.name,
+                   'storage': problem.storage, 'design': problem.design},
+        'runs': runs,
+        'projection': {
+            'samples': N,
+            'best_chunk_size': best['chunk_size'],
+            'wall_time_s': best['projected_wall_time_s'],
+            'peak_memory_bytes': peak_memory_bytes,
+            'output_bytes': field_bytes + (N_F + N_mu + N_nu + n_x + n_y + n_z) * FLOAT_BYTES,
+        },
+    }
+
+def environment_info():
+    """Returns the machine and library information stored alongside benchmark results."""
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'processor': platform.processor(),
+    }
@@ -1,4 +1,34 @@
+import numpy as np
 from abc import ABC, abstractmethod
+from scipy.stats import qmc
+
+DESIGNS = ('random', 'lhs', 'sobol')
+
+def sample_parameters(design, n, bounds):
+    """
+    Draws 'n' scattered parameter samples inside a box.
+
+    Args:
+        design (str): 'random' (independent uniform draws), 'lhs' (Latin hypercube) or 'sobol'
+                      (scrambled Sobol sequence, balanced when 'n' is a power of 2).
+        n (int): Number of samples.
+        bounds (list): (min, max) of each parameter.
+
+    Returns:
+        ndarray: Samples of shape (n, len(bounds)).
+    """
+    low, high = np.array(bounds, dtype=float).T
+    if design == 'random':
+        return low + np.random.rand(n, len(bounds)) * (high - low)
+    # Seeded from the global generator, so np.random.seed keeps runs reproducible.
+    seed = np.random.randint(2**31)
+    if design == 'lhs':
+        sampler = qmc.LatinHypercube(d=len(bounds), seed=seed)
+    elif design == 'sobol':
+        sampler = qmc.Sobol(d=len(bounds), scramble=True, seed=seed)
+    else:
+        raise ValueError(f"Invalid design '{design}'. Must be one of {DESIGNS}.")
+    return qmc.scale(sampler.random(n), low, high)
 
 class Datagen(ABC):
     def __init__(self, data_size, material_params, load_params, mesh_params, problem_setup):
@@ -1,14 +1,90 @@
+import os
 import time
 import logging
+import multiprocessing
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from tqdm.auto import tqdm
-from .data_generation_base import Datagen
-from .influence import influence
+from .data_generation_base import Datagen, sample_parameters
+from .influence import influence, influence_batch
+from .shards import ShardManifest
 
 logger = logging.getLogger(__name__)
 
+def _frequency_points(constants, r, z, freq, out=None):
+    """Evaluates one frequency at the broadcast (r, z) points, e.g. the whole mesh for
+    r[:, None] and z[None, :]. Defined at module level so it can be dispatched to a process pool.
+    """
+    (c11, c12, c13, c33, c44, dens, damp,
+     z_source, r_source, l_source,
+     bvptype, loadtype, component) = constants
+    return influence_batch(
+        c11, c12, c13, c33, c44,
+        dens, damp,
+        r, z,
+        z_source, r_source, l_source,
+        freq,
+        bvptype, loadtype, component,
+        out=out
+    )
+
+def _point(constants, r, z, freq):
+    (c11, c12, c13, c33, c44, dens, damp,
+     z_source, r_source, l_source,
+     bvptype, loadtype, component) = constants
+    return influence(
+        c11, c12, c13, c33, c44,
+        dens, damp,
+        r, z,
+        z_source, r_source, l_source,
+        freq,
+        bvptype, loadtype, component
+    )
+
+def dynamic_problem_from_params(p, **kwargs):
+    """Builds a 'DynamicFixedMaterialProblem' from the data generation config.
+
+    Args:
+        p (dict): Data generation parameters.
+        **kwargs: Keyword arguments forwarded to 'DynamicFixedMaterialProblem'.
+    """
+    data_size = (p["N"], 
+                 p["N_R"], 
+                 p["N_Z"])
+    load_params = ((p["OMEGA_MAX"]), # Gotta fix this, should evaluate
+                   (p["OMEGA_MIN"]), 
+                   (p["LOAD"]), 
+                   (p["Z_SOURCE"]), 
+                   (p["L_SOURCE"]), 
+                   (p["R_SOURCE"]))
+    mesh_params = ((p["R_MIN"], 
+                    p["R_MAX"], 
+                    p["Z_MIN"], 
+                    p["Z_MAX"]))
+    problem_setup = (p['COMPONENT'], 
+                     p['LOADTYPE'], 
+                     p['BVPTYPE'])
+    material_params = ((p["E"], 
+                        p["NU"], 
+                        p["DAMP"], 
+                        p["DENS"]))
+    return DynamicFixedMaterialProblem(
+        data_size,
+        material_params,
+        load_params,
+        mesh_params,
+        problem_setup,
+        sampling=p.get("SAMPLING", "random"),
+        adaptive_params=(p.get("ADAPTIVE_COARSE_FRACTION", 0.25),
+                         p.get("ADAPTIVE_PROBES_R", 5),
+                         p.get("ADAPTIVE_PROBES_Z", 5)),
+        **kwargs
+    )
+
 class DynamicFixedMaterialProblem(Datagen):
-    def __init__(self, data_size, material_params, load_params, mesh_params, problem_setup):
+    def __init__(self, data_size, material_params, load_params, mesh_params, problem_setup, workers=1, pool='process',
+                 shard_size=None, point_timeout=None, retries=1, cache=None, sampling='random', adaptive_params=(0.25, 5, 5),
+                 dtype='complex128'):
         """Data for point load in an isotropic halfspace.
 
         Args:
@@ -17,18 +93,120 @@ class DynamicFixedMaterialProblem(Datagen):
             load_params (tuple): Omega max, omega min, coordinates
             mesh_params (tuple): (r_max, r_min, z_min, z_max)
             problem_setup (tuple): (component, loadtype, bvptype)
+            workers (int): Number of parallel workers evaluating frequencies. 1 runs serially.
+            pool (str): 'thread' or 'process'. ctypes releases the GIL during the foreign call,
+                        so threads scale as long as the library is thread-safe.
+            shard_size (int, optional): If given, frequencies are evaluated in shards of this size which are
+                                        saved as they finish and skipped when the run is restarted.
+            point_timeout (float, optional): Seconds allowed per point evaluation. Slices that exceed it are
+                                             re-evaluated point by point in a process pool that is killed
+                                             on timeout. Requires 'shard_size'.
+            retries (int): Extra attempts for points that timed out or failed. Points still failing are NaN.
+            cache (GreenFunctionCache, optional): Persistent store of evaluated points. Only points missing
+                                                  from it are integrated, and new results are added to it.
+            sampling (str): 'random' draws N uniform frequencies, 'lhs' and 'sobol' draw stratified (Latin hypercube)
+                            or low-discrepancy ones. 'adaptive' starts from a coarse, evenly spaced set and places
+                            the remaining samples where interpolating between neighbours is worst.
+            adaptive_params (tuple): (coarse fraction of N, number of r probes, number of z probes) for 'adaptive'.
+            dtype (str): Dtype of the saved displacements ('complex128' or 'complex64'). Integration runs in complex128.
         """
         super().__init__(data_size, material_params, load_params, mesh_params, problem_setup)
+        if pool not in ('thread', 'process'):
+            raise ValueError(f"Invalid pool '{pool}'. Must be 'thread' or 'process'.")
+        if sampling not in ('random', 'lhs', 'sobol', 'adaptive'):
+            raise ValueError(f"Invalid sampling '{sampling}'. Must be 'random', 'lhs', 'sobol' or 'adaptive'.")
+        if sampling == 'adaptive' and shard_size:
+            raise ValueError("Adaptive sampling chooses frequencies as it goes and can't be combined with sharding.")
+        if point_timeout is not None and not shard_size:
+            raise ValueError("'point_timeout' is only supported for sharded generation ('shard_size').")
+        if np.dtype(dtype).kind != 'c':
+            raise ValueError(f"Invalid dtype '{dtype}'. Displacements are complex ('complex128' or 'complex64').")
+        self.dtype = np.dtype(dtype)
+        self.workers = workers
+        self.pool = pool
+        self.shard_size = shard_size
+        self.point_timeout = point_timeout
+        self.retries = retries
+        self.cache = cache
+        self.sampling = sampling
+        self.adaptive_params = adaptive_params
+        self.progress_bar = True
 
     def _get_input_functions(self):
         N, _, _ = self.data_size
-        omega_max, omega_min, _, _, _, r_source = self.load_params
+        omega_max, omega_min, _, _, _, _ = self.load_params
+        if self.sampling in ('lhs', 'sobol'):
+            omega = sample_parameters(self.sampling, N, [(omega_min, omega_max)])[:, 0]
+        else:
+            omega = omega_min + np.random.rand(N) * (omega_max - omega_min)
+        delta = omega * self._delta_per_omega()
+        return omega, delta
+
+    def _delta_per_omega(self):
+        """Factor converting circular frequency into nondimensional frequency (delta = omega * r_s * sqrt(dens / c44))."""
+        _, _, _, _, _, r_source = self.load_params
         Es, vs, _, dens = self.material_params
         e1 = Es / (1 + vs) / (1 - 2 * vs)
         c44 = e1 * (1 - 2 * vs) / 2
-        omega = omega_min + np.random.rand(N) * (omega_max - omega_min)
-        delta = omega * r_source * np.sqrt(dens / c44)
-        return omega, delta
+        return r_source * np.sqrt(dens / c44)
+
+    def _adaptive_samples(self, r_field, z_field):
+        """
+        Chooses the N frequencies adaptively and integrates them on the full mesh:
+            1. Evaluates an evenly spaced coarse set of frequencies at the cell centres of
+               [omega_min, omega_max] (the integrator returns NaN at delta = 0).
+            2. For every interval between neighbouring frequencies, evaluates the midpoint on a small
+               grid of (r, z) probe points only, and measures how far it is from the linear
+               interpolation of the neighbours, weighted by the interval width.
+            3. Spends the remaining budget on full-mesh evaluations of the midpoints with the largest
+               error, probing the new intervals they create, until N frequencies are evaluated.
+
+        Returns:
+            delta (ndarray): Sorted frequencies of shape (N,).
+            wd (ndarray): Complex displacements of shape (N, n_r, n_z).
+            duration (float): Integration time in seconds.
+            n_probe_points (int): Number of point evaluations spent on probing.
+        """
+        N, n_r, n_z = self.data_size
+        omega_max, omega_min, _, _, _, _ = self.load_params
+        coarse_fraction, n_probes_r, n_probes_z = self.adaptive_params
+        probe_r = np.unique(np.linspace(0, n_r - 1, min(n_probes_r, n_r)).round().astype(int))
+        probe_z = np.unique(np.linspace(0, n_z - 1, min(n_probes_z, n_z)).round().astype(int))
+
+        n_coarse = int(min(N, max(2, round(coarse_fraction * N))))
+        cell_centres = omega_min + (np.arange(n_coarse) + 0.5) * (omega_max - omega_min) / n_coarse
+        delta = list(cell_centres * self._delta_per_omega())
+        wd, duration = self._influencefunc(np.array(delta), r_field, z_field)
+        fields = list(wd)
+        errors = {}
+        n_probe_points = 0
+
+        while len(delta) < N:
+            order = np.argsort(delta)
+            neighbours = [(order[k], order[k + 1]) for k in range(len(order) - 1)]
+            unprobed = [pair for pair in neighbours if pair not in errors]
+            if unprobed:
+                midpoints = np.array([(delta[a] + delta[b]) / 2 for a, b in unprobed])
+                probes, probe_time = self._influencefunc(midpoints, r_field[probe_r], z_field[probe_z])
+                duration += probe_time
+                n_probe_points += probes.size
+                for (a, b), probe in zip(unprobed, probes):
+                    interpolated = (fields[a][np.ix_(probe_r, probe_z)] + fields[b][np.ix_(probe_r, probe_z)]) / 2
+                    errors[(a, b)] = np.linalg.norm(probe - interpolated) * abs(delta[b] - delta[a])
+
+            n_refine = min(N - len(delta), max(1, len(neighbours) // 4))
+            worst = sorted(neighbours, key=lambda pair: errors[pair], reverse=True)[:n_refine]
+            logger.debug(f"Refining {n_refine} interval(s), largest midpoint error {errors[worst[0]]:.3E}")
+            new_delta = np.array([(delta[a] + delta[b]) / 2 for a, b in worst])
+            new_fields, refine_time = self._influencefunc(new_delta, r_field, z_field)
+            duration += refine_time
+            for pair in worst:
+                del errors[pair]
+            delta.extend(new_delta)
+            fields.extend(new_fields)
+
+        order = np.argsort(delta)
+        return np.array(delta)[order], np.stack(fields)[order], duration, n_probe_points
     
     def _get_coordinates(self):
         _, n_r, n_z = self.data_size
@@ -40,12 +218,20 @@ class DynamicFixedMaterialProblem(Datagen):
         points = r_field, z_field
         return points
     
-    def _influencefunc(self, freqs, r_field, z_field):
-        # ---------- Get parameters ------------
-        N, n_r, n_z = self.data_size
+    def _nondimensional_constants(self, problem_setup=None):
+        """Material and source constants in the nondimensional form expected by 'axsanisgreen'
+        (stiffnesses divided by c44, unit density, lengths divided by the source radius).
+
+        Args:
+            problem_setup (tuple, optional): (component, loadtype, bvptype). Defaults to the problem's own setup.
+
+        Returns:
+            tuple: Leading arguments of 'influence_batch', in order, followed by
+                   (bvptype, loadtype, component).
+        """
         Es, vs, damp, dens = self.material_params
         _, _, _, z_source, l_source, r_source = self.load_params
-        component, loadtype, bvptype = self.problem_setup
+        component, loadtype, bvptype = problem_setup or self.problem_setup
 
         # ------------ Material ------------
         e1 = Es / (1 + vs) / (1 - 2 * vs)
@@ -54,10 +240,6 @@ class DynamicFixedMaterialProblem(Datagen):
         c13 = e1 * vs
         c33 = e1 * (1 - vs)
         c44 = e1 * (1 - 2 * vs) / 2
-        
-        # ---------- Displacement matrix ------------
-        num_freqs = N
-        wd = np.zeros((num_freqs, n_r, n_z), dtype=complex)
 
         # ------- Setting non-dimensional material constants ----------
         c11 = c11 / c44
@@ -69,35 +251,240 @@ class DynamicFixedMaterialProblem(Datagen):
         z_source = z_source / r_source
         r_source = r_source / r_source
 
+        return (c11, c12, c13, c33, c44,
+                dens, damp,
+                z_source, r_source, l_source,
+                bvptype, loadtype, component)
+
+    def _influencefunc(self, freqs, r_field, z_field):
+        wd, duration = self._influencefunc_setups([self.problem_setup], freqs, r_field, z_field)
+        return wd[0], duration
+
+    def _influencefunc_setups(self, setups, freqs, r_field, z_field):
+        """
+        Integrates several problem setups on the same frequencies and mesh. Every (setup, frequency)
+        pair is one task, and all tasks are scheduled on a single worker pool.
+
+        Args:
+            setups (list): Problem setups (component, loadtype, bvptype).
+            freqs (ndarray): Nondimensional frequencies.
+            r_field, z_field (ndarray): Nondimensional mesh coordinates.
+
+        Returns:
+            wd (ndarray): Complex array of shape (len(setups), len(freqs), n_r, n_z).
+            duration (float): Integration time in seconds.
+        """
+        # ---------- Get parameters ------------
+        n_r, n_z = len(r_field), len(z_field)
+        constants = [self._nondimensional_constants(setup) for setup in setups]
+
+        # ---------- Displacement matrix ------------
+        num_freqs = len(freqs)
+        wd = np.zeros((len(setups), num_freqs, n_r, n_z), dtype=complex)
+
         ## -------------- Computing displacement ----------------
         start = time.perf_counter_ns()
-        for i in tqdm(range(N), colour='Green'):
-            for j in range(n_r):
-                for k in range(n_z):
-                    wd[i, j, k] = influence(
-                                    c11, c12, c13, c33, c44,
-                                    dens, damp,
-                                    r_field[j], z_field[k],
-                                    z_source, r_source, l_source,
-                                    freqs[i],
-                                    bvptype, loadtype, component
-                                )
+        r_mesh, z_mesh = np.meshgrid(r_field, z_field, indexing='ij')
+        if self.cache is not None:
+            missing = np.stack([~self.cache.lookup(c, r_mesh[None], z_mesh[None], freqs[:, None, None], out=wd[s])
+                                for s, c in enumerate(constants)])
+        else:
+            missing = np.ones(wd.shape, dtype=bool)
+        to_compute = [(s, i) for s in range(len(setups)) for i in range(num_freqs) if missing[s, i].any()]
+        tasks = ((constants[s] for s, _ in to_compute),
+                 (r_mesh[missing[s, i]] for s, i in to_compute),
+                 (z_mesh[missing[s, i]] for s, i in to_compute),
+                 (freqs[i] for _, i in to_compute))
+
+        if self.workers <= 1:
+            results = map(_frequency_points, *tasks)
+            for (s, i), wd_i in zip(to_compute, tqdm(results, total=len(to_compute), colour='Green', disable=not self.progress_bar)):
+                wd[s, i][missing[s, i]] = wd_i
+        else:
+            executor_class = ThreadPoolExecutor if self.pool == 'thread' else ProcessPoolExecutor
+            with executor_class(max_workers=self.workers) as executor:
+                results = executor.map(_frequency_points, *tasks)
+                for (s, i), wd_i in zip(to_compute, tqdm(results, total=len(to_compute), colour='Green', disable=not self.progress_bar)):
+                    wd[s, i][missing[s, i]] = wd_i
+
+        if self.cache is not None:
+            for s, c in enumerate(constants):
+                if missing[s].any():
+                    self.cache.store(c,
+                                     np.broadcast_to(r_mesh, wd[s].shape)[missing[s]],
+                                     np.broadcast_to(z_mesh, wd[s].shape)[missing[s]],
+                                     np.broadcast_to(freqs[:, None, None], wd[s].shape)[missing[s]],
+                                     wd[s][missing[s]])
 
         end = time.perf_counter_ns()
         duration = (end - start) / 1e9
         return wd, duration
     
+    def _influencefunc_guarded(self, freqs, r_field, z_field):
+        """Same as '_influencefunc', but every evaluation runs in a process pool under a timeout.
+        A frequency slice that times out or fails is retried point by point, restarting the pool
+        (and so killing hung workers) after each attempt.
+
+        Returns:
+            wd (ndarray): Complex array of shape (len(freqs), n_r, n_z). Points that kept failing are NaN.
+            failed (list): (i, j, k) indices of the points that kept failing.
+        """
+        n_r, n_z = len(r_field), len(z_field)
+        constants = self._nondimensional_constants()
+        wd = np.full((len(freqs), n_r, n_z), np.nan, dtype=complex)
+
+        if self.cache is not None:
+            cached = self.cache.lookup(constants, r_field[None, :, None], z_field[None, None, :], freqs[:, None, None], out=wd)
+            to_compute = [i for i in range(len(freqs)) if not cached[i].all()]
+        else:
+            to_compute = list(range(len(freqs)))
+
+        to_retry = []
+        with multiprocessing.Pool(self.workers) as pool:
+            results = [pool.apply_async(_frequency_points, (constants, r_field[:, None], z_field[None, :], freqs[i]))
+                       for i in to_compute]
+            for i, result in zip(to_compute, results):
+                try:
+                    wd[i] = result.get(timeout=self.point_timeout * n_r * n_z)
+                except Exception as e:
+                    logger.warning(f"Frequency {freqs[i]:.4f} failed or timed out ({e!r}). Retrying point by point.")
+                    to_retry.extend((i, j, k) for j, k in np.ndindex(n_r, n_z))
+
+        for attempt in range(self.retries):
+            if not to_retry:
+                break
+            failed = []
+            with multiprocessing.Pool(self.workers) as pool:
+                results = [pool.apply_async(_point, (constants, r_field[j], z_field[k], freqs[i]))
+                           for i, j, k in to_retry]
+                for index, result in zip(to_retry, results):
+                    try:
+                        wd[index] = result.get(timeout=self.point_timeout)
+                    except Exception as e:
+                        logger.debug(f"Point {index} failed on attempt {attempt + 1}: {e!r}")
+                        failed.append(index)
+            to_retry = failed
+
+        if to_retry:
+            logger.warning(f"{len(to_retry)} point(s) failed after {self.retries} retries and were set to NaN.")
+        if self.cache is not None and to_compute:
+            self.cache.store(constants, r_field[None, :, None], z_field[None, None, :], freqs[to_compute, None, None], wd[to_compute])
+        return wd, to_retry
+
+    def _produce_samples_sharded(self, filename):
+        shard_dir = os.path.splitext(filename)[0] + '_shards'
+        manifest = ShardManifest(shard_dir)
+        settings = {
+            'data_size': list(self.data_size),
+            'material_params': list(self.material_params),
+            'load_params': list(self.load_params),
+            'mesh_params': list(self.mesh_params),
+            'problem_setup': list(self.problem_setup),
+        }
+
+        if manifest.exists():
+            manifest.load(settings)
+            inputs = manifest.load_inputs()
+            delta, r, z = inputs['delta'], inputs['r'], inputs['z']
+            logger.info(f"Resuming from {shard_dir}: {len(manifest.manifest['completed'])}/{manifest.manifest['n_shards']} shards completed.")
+        else:
+            _, delta = self._get_input_functions()
+            r, z = self._get_coordinates()
+            manifest.create({'delta': delta, 'r': r, 'z': z}, len(delta), self.shard_size, settings)
+
+        pending = manifest.pending_shards()
+        n_points = 0
+        start = time.perf_counter_ns()
+        for k in tqdm(pending, colour='Blue', desc='Shards'):
+            freqs = delta[manifest.shard_slice(k)]
+            if self.point_timeout is None:
+                wd, _ = self._influencefunc(freqs, r, z)
+                failed = []
+            else:
+                wd, failed = self._influencefunc_guarded(freqs, r, z)
+            manifest.write_shard(k, wd, failed)
+            n_points += wd.size
+        end = time.perf_counter_ns()
+        duration = (end - start) / 1e9
+
+        if pending:
+            logger.info(f"Runtime for integration: {duration:.2f} s ({n_points / duration:.1f} points/s, {self.workers} {self.pool} worker(s))")
+        self._log_cache_usage()
+        displacements = manifest.merge()
+        logger.info(f"\nData shapes:\n\t u:\t{delta.shape}\n\t g_u:\t{displacements.shape}\n\t r:\t{r.shape}\n\t z:\t{z.shape}")
+
+        np.savez(filename, delta=delta, r=r, z=z, g_u=displacements.astype(self.dtype, copy=False))
+        logger.info(f"Merged {manifest.manifest['n_shards']} shards from {shard_dir}")
+        logger.info(f"Saved at {filename}")
+
+    def _log_cache_usage(self):
+        if self.cache is not None:
+            logger.info(f"Green function cache: {self.cache.hits} hit(s), {self.cache.misses} miss(es) ({self.cache.path})")
+
     def produce_samples(self, filename):
-        input_functions = self._get_input_functions()
+        if self.shard_size:
+            return self._produce_samples_sharded(filename)
         coordinates = self._get_coordinates()
-        delta = input_functions[1]
         r, z = coordinates
-        displacements, times = self._influencefunc(delta, r, z)
+        if self.sampling == 'adaptive':
+            delta, displacements, times, n_probe_points = self._adaptive_samples(r, z)
+            logger.info(f"Adaptive sampling spent {n_probe_points} point evaluations on probing "
+                        f"({n_probe_points / displacements.size:.1%} of the full-mesh evaluations)")
+        else:
+            input_functions = self._get_input_functions()
+            delta = input_functions[1]
+            displacements, times = self._influencefunc(delta, r, z)
+            n_probe_points = 0
 
-        logger.info(f"Runtime for integration: {times:.2f} s")
+        n_points = displacements.size + n_probe_points
+        logger.info(f"Runtime for integration: {times:.2f} s ({n_points / times:.1f} points/s, {self.workers} {self.pool} worker(s))")
+        self._log_cache_usage()
         logger.info(f"\nData shapes:\n\t u:\t{delta.shape}\n\t g_u:\t{displacements.shape}\n\t r:\t{r.shape}\n\t z:\t{z.shape}")
         logger.info(f"\na0_min:\t\t\t{delta.min()} \na0_max:\t\t\t{delta.max()}")
         logger.info(f"\nr_min:\t\t\t{r.min()} \nr_max:\t\t\t{r.max()} \nz_min:\t\t\t{z.min()} \nz_max:\t\t\t{z.max()}")
 
-        np.savez(filename, delta=delta, r=r, z=z, g_u=displacements)
-        logger.info(f"Saved at {filename}")
\ No newline at end of file
+        np.savez(filename, delta=delta, r=r, z=z, g_u=displacements.astype(self.dtype, copy=False))
+        logger.info(f"Saved at {filename}")
+
+    def stream_samples(self, freqs, r_field, z_field, chunk_size, queue):
+        """
+        Integrates 'freqs' in chunks and puts every finished (delta, wd) chunk on 'queue', followed by None.
+        Meant to run as a producer process feeding a 'StreamingDynamicDataset'.
+
+        Args:
+            freqs (ndarray): Nondimensional frequencies evaluated by this producer.
+            r_field, z_field (ndarray): Nondimensional mesh coordinates.
+            chunk_size (int): Frequencies per queued chunk.
+            queue (multiprocessing.Queue): Bounded queue shared with the consumer. 'put' blocks while it is full.
+        """
+        self.progress_bar = False
+        for begin in range(0, len(freqs), chunk_size):
+            chunk = freqs[begin:begin + chunk_size]
+            wd, _ = self._influencefunc(chunk, r_field, z_field)
+            queue.put((chunk, wd))
+        queue.put(None)
+
+    def produce_sweep(self, setups, filenames):
+        """
+        Generates one dataset per problem setup in a single pass. All setups share the same
+        frequency samples and mesh, and their integrations are scheduled on one worker pool.
+
+        Args:
+            setups (list): Problem setups (component, loadtype, bvptype).
+            filenames (list): Output .npz file of each setup.
+        """
+        if self.shard_size or self.sampling == 'adaptive':
+            raise ValueError("Sweeps over several setups support neither sharding nor adaptive sampling.")
+        if len(setups) != len(filenames):
+            raise ValueError(f"Got {len(setups)} setup(s) but {len(filenames)} filename(s).")
+        r, z = self._get_coordinates()
+        _, delta = self._get_input_functions()
+        displacements, times = self._influencefunc_setups(setups, delta, r, z)
+
+        logger.info(f"Runtime for integration of {len(setups)} setup(s): {times:.2f} s "
+                    f"({displacements.size / times:.1f} points/s, {self.workers} {self.pool} worker(s))")
+        self._log_cache_usage()
+        logger.info(f"\nData shapes:\n\t u:\t{delta.shape}\n\t g_u:\t{displacements.shape[1:]}\n\t r:\t{r.shape}\n\t z:\t{z.shape}")
+        for (component, loadtype, bvptype), filename, wd in zip(setups, filenames, displacements):
+            np.savez(filename, delta=delta, r=r, z=z, g_u=wd.astype(self.dtype, copy=False))
+            logger.info(f"Saved component {component}, load type {loadtype}, BVP type {bvptype} at {filename}")
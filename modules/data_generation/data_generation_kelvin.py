@@ -1,13 +1,46 @@
+import os
 import time
 import logging
 import numpy as np
-from .data_generation_base import Datagen
+from .data_generation_base import Datagen, sample_parameters
 
 logger = logging.getLogger(__name__)
 
 class KelvinsProblemDeterministic(Datagen):
-    def __init__(self, data_size, material_params, load_params, mesh_params, problem_setup):
+    def __init__(self, data_size, material_params, load_params, mesh_params, problem_setup, chunk_size=None, dtype='float64', storage='full',
+                 design='grid', n_samples=None):
+        """Static response of an isotropic full space to a point load (Kelvin's problem).
+
+        Args:
+            data_size (tuple): (N_F, N_mu, N_nu, n_x, n_y, n_z)
+            material_params (tuple): (mu_min, mu_max, nu_min, nu_max)
+            load_params (tuple): (F_min, F_max)
+            mesh_params (tuple): (x_min, x_max, y_min, y_max, z_min, z_max)
+            problem_setup (str): Load direction ('x', 'y' or 'z').
+            chunk_size (int, optional): If given, branch samples are computed in blocks of this size
+                                        and written to a memory-mapped .npy target, so memory use
+                                        does not grow with the number of samples.
+            dtype (str): Output dtype ('float64', 'float32' or 'float16'). Samples are computed in float64.
+            storage (str): 'full' saves every displacement field as 'g_u'. 'factorized' uses
+                           u = F / (16 * π * mu) * K(nu, x) and saves the prefactors ('g_u_prefactor',
+                           shape (N_F, N_mu)) and the kernels ('g_u_kernel', shape (N_nu, n_x, n_y, n_z, 3))
+                           instead, which is about N_F * N_mu times smaller. Rows are rebuilt on access
+                           by 'preprocess_npz_data'.
+            design (str): 'grid' takes the Cartesian product of N_F, N_mu and N_nu sampled values.
+                          'random', 'lhs' or 'sobol' draw scattered (F, mu, nu) samples instead, which are
+                          saved as a single 'xb' array.
+            n_samples (int, optional): Number of scattered samples. Defaults to N_F * N_mu * N_nu.
+        """
         super().__init__(data_size, material_params, load_params, mesh_params, problem_setup)
+        self.chunk_size = chunk_size
+        self.dtype = np.dtype(dtype)
+        if storage not in ('full', 'factorized'):
+            raise ValueError(f"Invalid storage '{storage}'. Must be 'full' or 'factorized'.")
+        self.storage = storage
+        if design != 'grid' and storage == 'factorized':
+            raise ValueError("Factorized storage needs a 'grid' design.")
+        self.design = design
+        self.n_samples = n_samples
 
     def _get_input_functions(self):
         """Generate the branch data (operator parameters) by sampling N values for the load magnitude F,
@@ -23,6 +56,23 @@ class KelvinsProblemDeterministic(Datagen):
         mu_samples = mu_min + np.random.rand(N_mu) * (mu_max - mu_min)
         nu_samples = nu_min + np.random.rand(N_nu) * (nu_max - nu_min)
         return F_samples, mu_samples, nu_samples
+
+    @property
+    def n_branch_samples(self):
+        N_F, N_mu, N_nu, _, _, _ = self.data_size
+        if self.design == 'grid':
+            return N_F * N_mu * N_nu
+        return self.n_samples or N_F * N_mu * N_nu
+
+    def _get_scattered_input_functions(self):
+        """Draws scattered branch samples with the configured design.
+
+        Returns:
+            array: Shape (n_samples, 3) with columns [F, mu, nu].
+        """
+        mu_min, mu_max, nu_min, nu_max = self.material_params
+        F_min, F_max = self.load_params
+        return sample_parameters(self.design, self.n_branch_samples, [(F_min, F_max), (mu_min, mu_max), (nu_min, nu_max)])
     
     def _get_coordinates(self):
         """Generate the trunk data by defining a 3d grid in cartesian coordinates.
@@ -38,33 +88,15 @@ class KelvinsProblemDeterministic(Datagen):
         z_field = np.linspace(z_min, z_max, n_z)
         return x_field, y_field, z_field
         
-    def _influencefunc(self, input_functions, x_field, y_field, z_field):
+    def _grid_terms(self, x_field, y_field, z_field):
         """
-        Compute the Kelvin solution in Cartesian coordinates in a fully vectorized way.
-        This version assumes that the branch inputs (F, mu, nu) have been generated as the
-        Cartesian product of the individual sensor arrays (so that N = N_F * N_mu * N_nu).
-        For each branch sample (F, mu, nu) and for each grid point (x, y, z), the displacement
-        vector is computed using Kelvin's formula:
-        
-        u_i = (F / (16 * π * mu * (1 - nu))) * [ (3 - 4*nu)*δ_{i,d} / r  +  (x_i*x_d) / r³ ]
-        
-        where r = sqrt(x² + y² + z²), and d is the index corresponding to the load direction.
-        
-        Args:
-            input_functions (tuple): Tuple (F, mu, nu) each of shape (N,), where N is the total
-                                    number of branch samples (the Cartesian product of sensor values).
-            x_field (array): 1D array of x coordinates.
-            y_field (array): 1D array of y coordinates.
-            z_field (array): 1D array of z coordinates.
-        
+        Computes the terms of Kelvin's formula that only depend on the grid.
+
         Returns:
-            u (ndarray): Array of shape (N, n_x, n_y, n_z, 3) containing the displacement field.
-            duration (float): Computation time in seconds.
+            d (int): Index of the load direction.
+            r_inv (ndarray): 1 / r, shape (n_x, n_y, n_z).
+            term2 (ndarray): x_i * x_d / r³, shape (n_x, n_y, n_z, 3).
         """
-        start = time.perf_counter_ns()
-
-        F, mu, nu = input_functions.T
-        
         load_dir = self.problem_setup.lower()
         if load_dir == 'x':
             d = 0
@@ -79,53 +111,143 @@ class KelvinsProblemDeterministic(Datagen):
         coords = np.stack([X, Y, Z], axis=-1)
         
         r_vals = np.linalg.norm(coords, axis=-1)  # Shape: (n_x, n_y, n_z)
-        r_b = r_vals[None, ...]  # Shape: (1, n_x, n_y, n_z)
 
-        const = F / (16 * np.pi * mu * (1 - nu))
-        const = const[:, None, None, None]
+        r_inv = 1 / r_vals
+        r_inv3 = 1 / (r_vals ** 3)
 
-        factor = (3 - 4 * nu)
-        factor = factor[:, None, None, None]
+        coord_d = coords[..., d:d+1]  # shape: (n_x, n_y, n_z, 1)
+        term2 = (coords * coord_d) * r_inv3[..., None]  # Shape: (n_x, n_y, n_z, 3)
+        return d, r_inv, term2
 
-        coords_b = coords[None, ...]
-        
-        delta = np.zeros(3)
-        delta[d] = 1
-        delta = delta.reshape(1,1,1,1,3)
+    def _factorized_influencefunc(self, F, mu, nu, x_field, y_field, z_field):
+        """
+        Computes Kelvin's solution in factorized form, u(F, mu, nu) = prefactor(F, mu) * kernel(nu), with
 
-        r_inv = 1 / r_b
-        r_inv3 = 1 / (r_b ** 3)
+        prefactor = F / (16 * π * mu),    kernel_i = [ (3 - 4*nu)*δ_{i,d} / r  +  (x_i*x_d) / r³ ] / (1 - nu)
+
+        Args:
+            F, mu, nu (array): Sensor values, of shapes (N_F,), (N_mu,) and (N_nu,).
+            x_field, y_field, z_field (array): 1D coordinate arrays.
+
+        Returns:
+            prefactor (ndarray): Array of shape (N_F, N_mu).
+            kernel (ndarray): Array of shape (N_nu, n_x, n_y, n_z, 3).
+            duration (float): Computation time in milliseconds.
+        """
+        start = time.perf_counter_ns()
+        d, r_inv, term2 = self._grid_terms(x_field, y_field, z_field)
+
+        prefactor = (F[:, None] / (16 * np.pi * mu[None, :])).astype(self.dtype)
+        kernel = np.empty((len(nu), *term2.shape), dtype=self.dtype)
+        for n, nu_n in enumerate(nu):
+            u = term2.copy()
+            u[..., d] += (3 - 4 * nu_n) * r_inv
+            kernel[n] = u / (1 - nu_n)
+
+        end = time.perf_counter_ns()
+        return prefactor, kernel, (end - start) / 1e6
+
+    def _influencefunc(self, input_functions, x_field, y_field, z_field, out=None):
+        """
+        Compute the Kelvin solution in Cartesian coordinates in a fully vectorized way.
+        The branch inputs (F, mu, nu) are either the Cartesian product of the individual sensor
+        arrays (so that N = N_F * N_mu * N_nu) or scattered samples. For each branch sample (F, mu, nu) and for each grid point (x, y, z), the displacement
+        vector is computed using Kelvin's formula:
+        
+        u_i = (F / (16 * π * mu * (1 - nu))) * [ (3 - 4*nu)*δ_{i,d} / r  +  (x_i*x_d) / r³ ]
         
-        term1 = (factor[..., None] * delta) * r_inv[..., None]
+        where r = sqrt(x² + y² + z²), and d is the index corresponding to the load direction.
+
+        The grid-only terms are computed once, and branch samples are processed in blocks of
+        'chunk_size' rows written straight into 'out', so that no full-size temporaries are created.
         
-        coord_d = coords_b[..., d:d+1]  # shape: (1, n_x, n_y, n_z, 1)
-        term2 = (coords_b * coord_d) * r_inv3[..., None]
+        Args:
+            input_functions (array): Array of shape (N, 3) with columns [F, mu, nu], where N is the total
+                                    number of branch samples.
+            x_field (array): 1D array of x coordinates.
+            y_field (array): 1D array of y coordinates.
+            z_field (array): 1D array of z coordinates.
+            out (ndarray, optional): Array (e.g. a memory-mapped .npy) of shape (N, n_x, n_y, n_z, 3) to write into.
         
-        u = const[..., None] * (term1 + term2)
+        Returns:
+            u (ndarray): Array of shape (N, n_x, n_y, n_z, 3) containing the displacement field.
+            duration (float): Computation time in milliseconds.
+        """
+        start = time.perf_counter_ns()
+
+        F, mu, nu = input_functions.T
+        d, r_inv, term2 = self._grid_terms(x_field, y_field, z_field)
+
+        const = F / (16 * np.pi * mu * (1 - nu))
+        factor = (3 - 4 * nu)
+
+        N = len(F)
+        if out is None:
+            out = np.empty((N, *term2.shape), dtype=self.dtype)
+        chunk_size = self.chunk_size or N
+        block = np.empty((min(chunk_size, N), *term2.shape))
+
+        for begin in range(0, N, chunk_size):
+            end = min(begin + chunk_size, N)
+            u = block[ : end - begin]
+            u[:] = term2
+            u[..., d] += factor[begin:end, None, None, None] * r_inv
+            u *= const[begin:end, None, None, None, None]
+            out[begin:end] = u
         
         end = time.perf_counter_ns()
         duration = (end - start) / 1e6
-        return u, duration
+        return out, duration
     
     def produce_samples(self, filename):
-        input_functions = self._get_input_functions()
-        F, mu, nu = input_functions
         coordinates = self._get_coordinates()
         x_field, y_field, z_field = coordinates
-        sensors = np.meshgrid(*input_functions, indexing="ij")
-        input_functions_meshgrid = np.column_stack([i.flatten() for i in sensors])
+        if self.design == 'grid':
+            input_functions = self._get_input_functions()
+            F, mu, nu = input_functions
+            sensors = np.meshgrid(*input_functions, indexing="ij")
+            input_functions_meshgrid = np.column_stack([i.flatten() for i in sensors])
+            branch_data = {'F': F, 'mu': mu, 'nu': nu}
+        else:
+            input_functions_meshgrid = self._get_scattered_input_functions()
+            branch_data = {'xb': input_functions_meshgrid, 'xb_keys': np.array(['F', 'mu', 'nu'])}
+
+        if self.storage == 'factorized':
+            prefactor, kernel, duration = self._factorized_influencefunc(F, mu, nu, x_field, y_field, z_field)
+            logger.info(f"Runtime for computing factorized Kelvin solution: {duration:.3f} ms")
+            logger.info(f"\nData shapes:")
+            logger.info(f"   Input functions meshgrid (F, mu, nu): {input_functions_meshgrid.shape}")
+            logger.info(f"   Prefactor F / (16 π mu): {prefactor.shape}, kernel K(nu, x): {kernel.shape} ({kernel.dtype})")
+            logger.info(f"   x: {x_field.shape}, y: {y_field.shape}, z: {z_field.shape}")
+            np.savez(filename, F=F, mu=mu, nu=nu, x=x_field, y=y_field, z=z_field,
+                     g_u_prefactor=prefactor, g_u_kernel=kernel)
+            logger.info(f"Saved data at {filename}")
+            return
+
+        if self.chunk_size:
+            target_path = os.path.splitext(filename)[0] + '_g_u.npy'
+            shape = (len(input_functions_meshgrid), len(x_field), len(y_field), len(z_field), 3)
+            target = np.lib.format.open_memmap(target_path, mode='w+', dtype=self.dtype, shape=shape)
+            logger.info(f"Writing displacements in chunks of {self.chunk_size} samples to {target_path}")
+        else:
+            target = None
 
-        displacements, duration = self._influencefunc(input_functions_meshgrid, x_field, y_field, z_field)
+        displacements, duration = self._influencefunc(input_functions_meshgrid, x_field, y_field, z_field, out=target)
 
         logger.info(f"Runtime for computing Kelvin solution: {duration:.3f} ms")
         logger.info(f"\nData shapes:")
-        logger.info(f"   Input functions meshgrid (F, mu, nu): {input_functions_meshgrid.shape}")
-        logger.info(f"   Displacements u: {displacements.shape}")
+        logger.info(f"   Input functions ({self.design}) (F, mu, nu): {input_functions_meshgrid.shape}")
+        logger.info(f"   Displacements u: {displacements.shape} ({displacements.dtype})")
         logger.info(f"   x: {x_field.shape}, y: {y_field.shape}, z: {z_field.shape}")
         logger.info(f"\nLoad magnitude min = {input_functions_meshgrid[:, 0].min():.3f}, max = {input_functions_meshgrid[:, 0].max():.3f}")
         logger.info(f"x: min = {x_field.min():3f}, max = {x_field.max():.3f}")
         logger.info(f"y: min = {y_field.min():3f}, max = {y_field.max():.3f}")
         logger.info(f"z: min = {z_field.min():3f}, max = {z_field.max():.3f}")
 
-        np.savez(filename, F=F, mu=mu, nu=nu, x=x_field, y=y_field, z=z_field, g_u=displacements)
-        logger.info(f"Saved data at {filename}")
\ No newline at end of file
+        # np.savez streams memory-mapped arrays into the archive in buffered pieces.
+        np.savez(filename, **branch_data, x=x_field, y=y_field, z=z_field, g_u=displacements)
+        if self.chunk_size:
+            displacements.flush()
+            del displacements, target
+            os.remove(target_path)
+        logger.info(f"Saved data at {filename}")
@@ -0,0 +1,109 @@
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class GreenFunctionCache:
+    def __init__(self, path, max_entries=10_000_000, significant_digits=13):
+        """
+        Persistent, content-addressed store of evaluated Green-function points.
+
+        Entries are keyed by a hash of the nondimensional inputs of 'axsanisgreen'
+        (c11, c12, c13, c33, c44, dens, damp, z_source, r_source, l_source, bvptype, loadtype,
+        component, r, z, delta), rounded to 'significant_digits' so that physically identical
+        inputs reached through different E / dens / omega combinations share an entry.
+        When the cache grows beyond 'max_entries', the least recently used entries are evicted.
+
+        Args:
+            path (str): SQLite file backing the cache.
+            max_entries (int): Maximum number of stored points.
+            significant_digits (int): Digits kept from each floating point input when building keys.
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.float_format = f"{{:.{significant_digits - 1}e}}"
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS points (key BLOB PRIMARY KEY, re REAL, im REAL, last_used INTEGER)"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS points_last_used ON points (last_used)")
+        self.connection.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def _keys(self, constants, r, z, freqs):
+        *floats, bvptype, loadtype, component = constants
+        prefix = "|".join([self.float_format.format(float(c)) for c in floats]
+                          + [str(int(bvptype)), str(int(loadtype)), str(int(component))])
+        fmt = self.float_format
+        return [hashlib.blake2b(f"{prefix}|{fmt.format(ri)}|{fmt.format(zi)}|{fmt.format(fi)}".encode(),
+                                digest_size=16).digest()
+                for ri, zi, fi in zip(r.ravel().tolist(), z.ravel().tolist(), freqs.ravel().tolist())]
+
+    def lookup(self, constants, r, z, freqs, out):
+        """
+        Fills 'out' with the cached values of the broadcast (r, z, freqs) points.
+
+        Args:
+            constants (tuple): Nondimensional constants, as returned by '_nondimensional_constants'.
+            r, z, freqs (array_like): Point coordinates and frequencies, broadcast against each other.
+            out (ndarray): Complex array with the broadcast shape. Only cached points are written.
+
+        Returns:
+            ndarray: Boolean mask of the points found in the cache.
+        """
+        r, z, freqs = np.broadcast_arrays(r, z, freqs)
+        keys = self._keys(constants, r, z, freqs)
+        found = {}
+        for begin in range(0, len(keys), 500):
+            chunk = keys[begin:begin + 500]
+            query = f"SELECT key, re, im FROM points WHERE key IN ({','.join('?' * len(chunk))})"
+            found.update((key, (re, im)) for key, re, im in self.connection.execute(query, chunk))
+
+        hit = np.zeros(out.shape, dtype=bool)
+        flat_out = out.reshape(-1)
+        flat_hit = hit.reshape(-1)
+        for n, key in enumerate(keys):
+            value = found.get(key)
+            if value is not None:
+                flat_out[n] = complex(*value)
+                flat_hit[n] = True
+
+        if found:
+            self.connection.executemany("UPDATE points SET last_used = ? WHERE key = ?",
+                                        [(time.time_ns(), key) for key in found])
+            self.connection.commit()
+        self.hits += int(hit.sum())
+        self.misses += hit.size - int(hit.sum())
+        return hit
+
+    def store(self, constants, r, z, freqs, values):
+        """Adds evaluated points to the cache. NaN values (failed evaluations) are skipped."""
+        r, z, freqs, values = np.broadcast_arrays(r, z, freqs, values)
+        valid = ~np.isnan(values)
+        keys = self._keys(constants, r[valid], z[valid], freqs[valid])
+        now = time.time_ns()
+        self.connection.executemany("INSERT OR REPLACE INTO points VALUES (?, ?, ?, ?)",
+                                    [(key, v.real, v.imag, now) for key, v in zip(keys, values[valid].tolist())])
+        self.connection.commit()
+        self._evict()
+
+    def _evict(self):
+        (count,) = self.connection.execute("SELECT COUNT(*) FROM points").fetchone()
+        excess = count - self.max_entries
+        if excess > 0:
+            self.connection.execute(
+                "DELETE FROM points WHERE key IN (SELECT key FROM points ORDER BY last_used LIMIT ?)", (excess,)
+            )
+            self.connection.commit()
+            logger.info(f"Evicted {excess} least recently used point(s) from {self.path}")
+
+    def close(self):
+        self.connection.close()
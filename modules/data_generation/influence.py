@@ -1,14 +1,17 @@
 from ctypes import CDLL, c_double, c_long, POINTER, byref
+from functools import lru_cache
+import numpy as np
 import platform
 import os
 
-def influence(c11_val, c12_val, c13_val, c33_val, c44_val,
-               dens_val, damp_val,
-               r_campo_val, z_campo_val,
-               z_fonte_val, r_fonte_val, l_fonte_val,
-               freq_val,
-               bvptype_val, loadtype_val, component_val):
-    
+@lru_cache(maxsize=None)
+def _load_library():
+    """Loads the axsgrsce shared library once per process and declares the
+    signature of 'axsanisgreen'.
+
+    Returns:
+        CDLL: Handle to the loaded library.
+    """
     system = platform.system()
 
     if system == 'Windows':
@@ -19,9 +22,9 @@ def influence(c11_val, c12_val, c13_val, c33_val, c44_val,
         lib_name = 'axsgrsce.so'
     else:
         raise OSError('Unsupported operating system')
-    
-    lib_path = os.path.join('./data_generation/', lib_name)
-    
+
+    lib_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), lib_name)
+
     lib = CDLL(lib_path)
 
     lib.axsanisgreen.argtypes = [
@@ -34,6 +37,16 @@ def influence(c11_val, c12_val, c13_val, c33_val, c44_val,
         POINTER(c_double), POINTER(c_double) # outputs: resultr and resulti
     ]
     lib.axsanisgreen.restype = None
+    return lib
+
+def influence(c11_val, c12_val, c13_val, c33_val, c44_val,
+               dens_val, damp_val,
+               r_campo_val, z_campo_val,
+               z_fonte_val, r_fonte_val, l_fonte_val,
+               freq_val,
+               bvptype_val, loadtype_val, component_val):
+
+    lib = _load_library()
 
     c11 = c_double(c11_val)
     c12 = c_double(c12_val)
@@ -67,4 +80,75 @@ def influence(c11_val, c12_val, c13_val, c33_val, c44_val,
     )
 
     wd = resultr.value + 1j * resulti.value
-    return wd
\ No newline at end of file
+    return wd
+
+def influence_batch(c11_val, c12_val, c13_val, c33_val, c44_val,
+                    dens_val, damp_val,
+                    r_campo, z_campo,
+                    z_fonte_val, r_fonte_val, l_fonte_val,
+                    freqs,
+                    bvptype_val, loadtype_val, component_val,
+                    out=None):
+    """Evaluates the influence function over arrays of field points and frequencies.
+
+    The material, source and problem setup arguments are scalars shared by every point.
+    'r_campo', 'z_campo' and 'freqs' are broadcast against each other, and each point of
+    the broadcast shape is written into 'out'. The ctypes arguments are allocated once
+    and only their values are updated between foreign calls.
+
+    Args:
+        r_campo (array_like): Radial coordinates of the field points.
+        z_campo (array_like): Vertical coordinates of the field points.
+        freqs (array_like): (Nondimensional) frequencies.
+        out (ndarray, optional): Complex array with the broadcast shape to write into.
+
+    Returns:
+        ndarray: Complex array with the broadcast shape of (r_campo, z_campo, freqs).
+    """
+    lib = _load_library()
+
+    r_b, z_b, freq_b = np.broadcast_arrays(np.asarray(r_campo, dtype=float),
+                                           np.asarray(z_campo, dtype=float),
+                                           np.asarray(freqs, dtype=float))
+    if out is None:
+        out = np.empty(r_b.shape, dtype=complex)
+    elif out.shape != r_b.shape:
+        raise ValueError(f"Output shape {out.shape} does not match broadcast input shape {r_b.shape}.")
+
+    c11 = c_double(c11_val)
+    c12 = c_double(c12_val)
+    c13 = c_double(c13_val)
+    c33 = c_double(c33_val)
+    c44 = c_double(c44_val)
+    dens = c_double(dens_val)
+    damp = c_double(damp_val)
+    r = c_double()
+    z = c_double()
+    h = c_double(z_fonte_val)
+    loadr = c_double(r_fonte_val)
+    loadh = c_double(l_fonte_val)
+    omega = c_double()
+    bvptype = c_long(bvptype_val)
+    loadtype = c_long(loadtype_val)
+    component = c_long(component_val)
+
+    resultr = c_double()
+    resulti = c_double()
+
+    args = (byref(c11), byref(c12), byref(c13), byref(c33), byref(c44),
+            byref(dens), byref(damp),
+            byref(r), byref(z),
+            byref(h), byref(loadr), byref(loadh),
+            byref(omega),
+            byref(bvptype), byref(loadtype), byref(component),
+            byref(resultr), byref(resulti))
+    green = lib.axsanisgreen
+
+    for index in np.ndindex(out.shape):
+        r.value = r_b[index]
+        z.value = z_b[index]
+        omega.value = freq_b[index]
+        green(*args)
+        out[index] = complex(resultr.value, resulti.value)
+
+    return out
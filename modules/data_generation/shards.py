@@ -0,0 +1,117 @@
+import os
+import json
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class ShardManifest:
+    def __init__(self, directory):
+        """Keeps track of the frequency shards of a dataset that is generated in pieces.
+
+        The directory holds:
+            - 'inputs.npz': the sampled input functions and coordinates, so that a resumed run
+              evaluates exactly the same points.
+            - 'shard_XXXXX.npy': one array per completed shard.
+            - 'manifest.json': shard layout, generation settings and completed shards.
+
+        Args:
+            directory (str): Folder where shards and manifest are stored.
+        """
+        self.directory = directory
+        self.manifest_path = os.path.join(directory, 'manifest.json')
+        self.inputs_path = os.path.join(directory, 'inputs.npz')
+        self.manifest = None
+
+    def exists(self):
+        return os.path.isfile(self.manifest_path) and os.path.isfile(self.inputs_path)
+
+    def create(self, inputs, n_items, shard_size, settings):
+        """Starts a new sharded run.
+
+        Args:
+            inputs (dict): Arrays saved once and returned by 'load_inputs' on resume.
+            n_items (int): Length of the sharded (first) axis.
+            shard_size (int): Number of items per shard.
+            settings (dict): JSON-serializable generation settings. A resumed run must match them.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        np.savez(self.inputs_path, **inputs)
+        self.manifest = {
+            'n_items': int(n_items),
+            'shard_size': int(shard_size),
+            'n_shards': int(np.ceil(n_items / shard_size)),
+            'settings': settings,
+            'completed': [],
+            'failed_points': {},
+        }
+        self._write_manifest()
+
+    def load(self, settings):
+        """Loads an existing manifest and checks it was produced with the same settings.
+
+        Raises:
+            ValueError: If the stored settings differ from the current ones.
+        """
+        with open(self.manifest_path, 'r') as file:
+            self.manifest = json.load(file)
+        if self.manifest['settings'] != settings:
+            raise ValueError(f"Shards in '{self.directory}' were generated with different settings:\n"
+                             f"stored: {self.manifest['settings']}\ncurrent: {settings}")
+
+    def load_inputs(self):
+        with np.load(self.inputs_path) as data:
+            return {key: data[key] for key in data.files}
+
+    def pending_shards(self):
+        completed = set(self.manifest['completed'])
+        return [k for k in range(self.manifest['n_shards']) if k not in completed]
+
+    def shard_slice(self, k):
+        shard_size = self.manifest['shard_size']
+        return slice(k * shard_size, min((k + 1) * shard_size, self.manifest['n_items']))
+
+    def shard_path(self, k):
+        return os.path.join(self.directory, f'shard_{k:05d}.npy')
+
+    def write_shard(self, k, array, failed_points=None):
+        """Saves one shard and records it as completed. Both writes are atomic, so an interrupted
+        run never leaves a shard marked as done without its data.
+
+        Args:
+            k (int): Shard index.
+            array (ndarray): Shard data, sharded axis first.
+            failed_points (list, optional): Indices (within the shard) of points that could not be evaluated.
+        """
+        tmp_path = self.shard_path(k) + '.tmp'
+        with open(tmp_path, 'wb') as file:
+            np.save(file, array)
+        os.replace(tmp_path, self.shard_path(k))
+        if failed_points:
+            self.manifest['failed_points'][str(k)] = [list(map(int, p)) for p in failed_points]
+        self.manifest['completed'] = sorted(set(self.manifest['completed']) | {k})
+        self._write_manifest()
+
+    def merge(self):
+        """Concatenates all shards along the first axis.
+
+        Returns:
+            ndarray: Full array of length 'n_items'.
+        """
+        pending = self.pending_shards()
+        if pending:
+            raise ValueError(f"Cannot merge: {len(pending)} shard(s) are still missing ({pending[:5]}...).")
+        first = np.load(self.shard_path(0), mmap_mode='r')
+        merged = np.empty((self.manifest['n_items'], *first.shape[1:]), dtype=first.dtype)
+        for k in range(self.manifest['n_shards']):
+            merged[self.shard_slice(k)] = np.load(self.shard_path(k), mmap_mode='r')
+        if self.manifest['failed_points']:
+            n_failed = sum(len(v) for v in self.manifest['failed_points'].values())
+            logger.warning(f"{n_failed} point(s) could not be evaluated and were stored as NaN. See {self.manifest_path}")
+        return merged
+
+    def _write_manifest(self):
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w') as file:
+            json.dump(self.manifest, file, indent=4)
+        os.replace(tmp_path, self.manifest_path)
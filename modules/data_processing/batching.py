@@ -0,0 +1,77 @@
+import logging
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+class MiniBatchLoader:
+    def __init__(self, get_batch, indices, n_trunk_points, batch_size=None, trunk_batch_size=None, seed=None, prefetch=True):
+        """
+        Splits the training set into mini-batches of branch samples and, optionally, random subsets of
+        trunk points. Every pass shuffles the samples with a generator seeded once, so runs with the same
+        seed see the same batches. The next batch is built in a background thread while the current one is used.
+
+        Args:
+            get_batch (callable): Called as get_batch(rows, points) with dataset indices and trunk point
+                                  indices (None for all points). Returns a batch dictionary.
+            indices (list): Training indices. A live list (e.g. of a streaming dataset) is read at every pass.
+            n_trunk_points (int): Number of trunk points.
+            batch_size (int, optional): Branch samples per batch. All samples if None.
+            trunk_batch_size (int, optional): Trunk points per batch. All points if None.
+            seed (int, optional): Seed of the shuffling generator.
+            prefetch (bool): If True, prepares the next batch in a background thread.
+        """
+        self.get_batch = get_batch
+        self.indices = indices
+        self.n_trunk_points = n_trunk_points
+        self.batch_size = batch_size
+        self.trunk_batch_size = trunk_batch_size
+        self.prefetch = prefetch
+        self.rng = np.random.default_rng(seed)
+
+    def _plan(self, rows=True, points=True):
+        indices = np.asarray(self.indices)
+        if rows and self.batch_size and self.batch_size < len(indices):
+            indices = self.rng.permutation(indices)
+            row_batches = [indices[i : i + self.batch_size] for i in range(0, len(indices), self.batch_size)]
+        else:
+            row_batches = [indices]
+
+        plan = []
+        for row_batch in row_batches:
+            if points and self.trunk_batch_size and self.trunk_batch_size < self.n_trunk_points:
+                trunk_points = np.sort(self.rng.choice(self.n_trunk_points, self.trunk_batch_size, replace=False))
+            else:
+                trunk_points = None
+            plan.append((row_batch.tolist(), trunk_points))
+        return plan
+
+    def epoch(self, transform=None, rows=True, points=True):
+        """
+        Yields the batches of one pass over the training set.
+
+        Args:
+            transform (callable, optional): Applied to every batch (in the background thread when prefetching).
+            rows (bool): If False, every batch holds all branch samples.
+            points (bool): If False, every batch holds all trunk points.
+        """
+        def load(step):
+            batch = self.get_batch(*step)
+            return transform(batch) if transform else batch
+
+        plan = self._plan(rows, points)
+        if not self.prefetch or len(plan) == 1:
+            for step in plan:
+                yield load(step)
+            return
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(load, plan[0])
+            for step in plan[1:]:
+                batch = future.result()
+                future = executor.submit(load, step)
+                yield batch
+            yield future.result()
+
+    def __len__(self):
+        return max(1, -(-len(self.indices) // self.batch_size)) if self.batch_size else 1
@@ -1,3 +1,7 @@
+from abc import ABC, abstractmethod
+import torch
+from .preprocessing import TrunkFeatureExpansion
+
 class Compose:
     def __init__(self, transforms):
         self.transforms = transforms
@@ -5,4 +9,96 @@ class Compose:
     def __call__(self, sample):
         for transform in self.transforms:
             sample = transform(sample)
-        return sample
\ No newline at end of file
+        return sample
+
+class BatchTransform(ABC):
+    # The result depends only on the input values, so constant inputs can be transformed once.
+    cacheable = True
+
+    def __init__(self, keys=None):
+        """
+        Transform applied to whole arrays of a batch dictionary.
+
+        Args:
+            keys (iterable of str, optional): Fields it applies to. All fields if None.
+        """
+        self.keys = None if keys is None else set(keys)
+
+    def applies_to(self, key):
+        return self.keys is None or key in self.keys
+
+    @abstractmethod
+    def transform(self, key, values):
+        pass
+
+    def __call__(self, batch):
+        return {key: self.transform(key, values) if self.applies_to(key) else values
+                for key, values in batch.items()}
+
+class BatchToTensor(BatchTransform):
+    def __init__(self, dtype, device, keys=None):
+        """Converts arrays to tensors of 'dtype' on 'device', without copying those that already are."""
+        super().__init__(keys)
+        self.dtype = dtype
+        self.device = device
+
+    def transform(self, key, values):
+        return torch.as_tensor(values).to(dtype=self.dtype, device=self.device)
+
+class BatchScaling(BatchTransform):
+    def __init__(self, scalers):
+        """
+        Args:
+            scalers (dict): 'Scaling' object of each field, applied with 'Scaling.scale'.
+        """
+        super().__init__(scalers.keys())
+        self.scalers = scalers
+
+    def transform(self, key, values):
+        return self.scalers[key].scale(values)
+
+class BatchTrunkFeatureExpansion(BatchTransform):
+    def __init__(self, n_features, keys=('xt',)):
+        """Appends the sine and cosine features of 'TrunkFeatureExpansion' to the trunk points."""
+        super().__init__(keys)
+        self.expansion = TrunkFeatureExpansion(n_features)
+
+    def transform(self, key, values):
+        return self.expansion(values)
+
+class BatchCompose:
+    def __init__(self, transforms, keys=None, constant_keys=('xt',)):
+        """
+        Applies a sequence of 'BatchTransform's to a batch in a single pass: every field goes through
+        the transforms that apply to it, one after the other. Constant fields whose transforms are all
+        cacheable are cached by identity, so e.g. the trunk returned by 'get_trunk' is transformed once
+        and the stored result is returned while the same object is passed in.
+
+        Args:
+            transforms (list of BatchTransform): Transforms, in the order they are applied.
+            keys (iterable of str, optional): Fields kept in the result. All fields if None.
+            constant_keys (iterable of str): Fields that are cached.
+        """
+        self.transforms = transforms
+        self.keys = None if keys is None else list(keys)
+        self.constant_keys = set(constant_keys)
+        self.cache = {}
+
+    def transform(self, key, values):
+        chain = [transform for transform in self.transforms if transform.applies_to(key)]
+        cacheable = key in self.constant_keys and all(transform.cacheable for transform in chain)
+        if cacheable:
+            cached = self.cache.get(key)
+            if cached is not None and cached[0] is values:
+                return cached[1]
+        result = values
+        for transform in chain:
+            result = transform.transform(key, result)
+        if cacheable:
+            # Holding the input keeps its id from being reused by another object.
+            self.cache[key] = (values, result)
+        return result
+
+    def __call__(self, batch):
+        keys = batch.keys() if self.keys is None else self.keys
+        return {key: self.transform(key, batch[key]) for key in keys}
@@ -1,29 +1,50 @@
 import torch
 import logging
+import numpy as np
+from .preprocessing import TrunkGrid, complex_as_real
 
 logger = logging.getLogger(__name__)
 
+# Position of each target in the trailing (re, im) axis of a complex 'g_u'.
+COMPLEX_PARTS = {'g_u_real': 0, 'g_u_imag': 1}
+
 class DeepONetDataset(torch.utils.data.Dataset):
-    def __init__(self, data, transform=None, output_keys=None):
+    def __init__(self, data, transform=None, output_keys=None, upcast=None):
         """
         Args:
             data (dict): Dictionary containing the data.
                 It must include:
                   - Branch inputs under the 'xb' key.
-                  - Trunk inputs under the 'xt' key. Must be in meshgrid format: (n_coordinate_points, n_dimensions).
+                  - Trunk inputs under the 'xt' key. Must be in meshgrid format: (n_coordinate_points, n_dimensions),
+                    or a 'TrunkGrid', which is only materialized the first time the full trunk is requested.
+                    Subsets of trunk points ('get_samples') are generated from its axes.
                   - Target outputs under keys specified in output_keys. Each output will be in a (N_input_functions, N_coordinate_points) format.
-            transform (callable, optional): Transformation applied to all fields.
+            transform (callable, optional): Transformation applied to all fields (e.g. 'ToTensor'). In-memory
+                                            arrays are transformed once here and kept as tensors, so indexing
+                                            returns views or gathered rows. Lazy fields (memory-mapped arrays,
+                                            'FactorizedField') are transformed on access.
             output_keys (list of str): List of keys for output fields. These keys must exist in data (e.g 'g_u').
+            upcast (ToTensor, optional): Training precision and device. In-memory outputs stored with less precision
+                                         (e.g. float16 or complex64 datasets) are kept as tensors of their own dtype
+                                         on its device and converted with it per batch, when indexed.
+                                         'g_u_real' and 'g_u_imag' of an in-memory complex 'g_u' are held as the
+                                         two views of one complex tensor of this precision ('complex_as_real').
         Raises:
             ValueError: If any required key is missing or if the outputs in data do not match the provided output_keys.
         """
 
-        self.branch = data['xb']
-        self.trunk = data['xt']
+        self.transform = transform
+        self.upcast = upcast
+        self.branch = self._resident(data['xb'])
+        self.grid = data['xt'] if isinstance(data['xt'], TrunkGrid) else None
+        self.trunk = None if self.grid is not None else self._resident(data['xt'])
         self.output_keys = output_keys
 
         logger.info(f"\nShape of xb:\t{self.branch.shape}")
-        logger.info(f"\nShape of xt:\t{self.trunk.shape}")
+        if self.grid is not None:
+            logger.info(f"\nShape of xt:\t({len(self.grid)}, {len(self.grid.axes)}) (grid of {self.grid.shape})")
+        else:
+            logger.info(f"\nShape of xt:\t{self.trunk.shape}")
         
         if self.output_keys is None:
             raise ValueError("output_keys must be provided and match keys in data.")
@@ -34,32 +55,121 @@ class DeepONetDataset(torch.utils.data.Dataset):
 
         num_samples = self.branch.shape[0]
         self.outputs = {}
+        self.reduced = set()
+        parts = self._complex_parts(data.get('g_u'), num_samples)
 
         for key in self.output_keys:
             field = data[key]
-            self.outputs[key] = field.reshape(num_samples, -1)
+            if parts is not None and key in COMPLEX_PARTS:
+                self.outputs[key] = parts[..., COMPLEX_PARTS[key]]
+                if parts.dtype != self.upcast.dtype:
+                    self.reduced.add(key)
+            elif self._is_lazy(field):
+                # Reshaped per access: reshaping e.g. a direction slice of a memory map would read all of it.
+                if len(field) != num_samples:
+                    raise ValueError(f"'{key}' has {len(field)} rows but there are {num_samples} input functions.")
+                self.outputs[key] = field
+            elif self._is_reduced(field):
+                self.outputs[key] = torch.as_tensor(field.reshape(num_samples, -1), device=self.upcast.device)
+                self.reduced.add(key)
+            else:
+                self.outputs[key] = self._resident(field.reshape(num_samples, -1))
             logger.info(f"Shape of {key}:\t{self.outputs[key].shape}")
         
-        self.transform = transform
         self.n_outputs = len(self.output_keys)
 
+    @staticmethod
+    def _is_lazy(field):
+        return isinstance(field, np.memmap) or not isinstance(field, (np.ndarray, torch.Tensor))
+
+    def _is_reduced(self, field):
+        """Whether an in-memory field has fewer bits per (real) component than the upcast dtype."""
+        if self.upcast is None or not isinstance(field, np.ndarray) or field.dtype.kind not in 'fc':
+            return False
+        return np.finfo(field.dtype).bits < torch.finfo(self.upcast.dtype).bits
+
+    def _complex_parts(self, g_u, num_samples):
+        """
+        Real and imaginary targets of an in-memory complex 'g_u', as one (num_samples, n_points, 2) tensor
+        viewing a complex tensor ('complex_as_real'). Complex128 data trained in float32 is converted once to
+        complex64, and reduced-precision data keeps its dtype. Returns None when the parts aren't used or
+        can't be held this way (lazy data, no 'upcast' or a precision without a complex dtype).
+        """
+        complex_dtypes = {torch.float32: torch.complex64, torch.float64: torch.complex128}
+        if (g_u is None or not set(COMPLEX_PARTS) & set(self.output_keys) or self._is_lazy(g_u)
+                or not np.iscomplexobj(g_u) or self.upcast is None or self.upcast.dtype not in complex_dtypes):
+            return None
+        values = torch.as_tensor(g_u.reshape(num_samples, -1), device=self.upcast.device)
+        if not self._is_reduced(g_u):
+            values = values.to(complex_dtypes[self.upcast.dtype])
+        return complex_as_real(values)
+
+    def _resident(self, field):
+        """Applies the transform once to arrays held in memory. Lazy fields are returned unchanged."""
+        if self.transform and not self._is_lazy(field) and not torch.is_tensor(field):
+            return self.transform(field)
+        return field
+
+    def _take(self, field, idx, flatten=False):
+        if torch.is_tensor(field):
+            if isinstance(idx, (int, slice)):
+                return field[idx]
+            return field[torch.as_tensor(idx, dtype=torch.long, device=field.device)]
+        values = field[idx]
+        if flatten and self._is_lazy(field):
+            values = values.reshape(-1) if isinstance(idx, (int, np.integer)) else values.reshape(len(values), -1)
+        return self.transform(values) if self.transform else values
+
+    @staticmethod
+    def _take_points(values, points):
+        if torch.is_tensor(values):
+            return values[..., torch.as_tensor(points, dtype=torch.long, device=values.device)]
+        return values[..., np.asarray(points)]
+
     def __len__(self):
         return len(self.branch)
 
     def __getitem__(self, idx):
+        return self.get_samples(idx)
+
+    def get_samples(self, idx, points=None):
+        """
+        Samples 'idx' restricted to the trunk points 'points' (all points if None), in the format of '__getitem__'.
+        Point subsets of a 'TrunkGrid' are generated from its axes, without building the full trunk.
+        """
         if torch.is_tensor(idx):
             idx = idx.tolist()
 
-        branch_input = self.branch[idx]
-        trunk_input = self.trunk
-        outputs = {key: self.outputs[key][idx] for key in self.output_keys}
-
-        if self.transform:
-            branch_input = self.transform(branch_input)
-            trunk_input = self.transform(trunk_input)
-            outputs = {key: self.transform(val) for key, val in outputs.items()}
+        branch_input = self._take(self.branch, idx)
+        trunk_input = self.get_trunk(points)
+        outputs = {key: self._take(self.outputs[key], idx, flatten=True) for key in self.output_keys}
+        if points is not None:
+            outputs = {key: self._take_points(values, points) for key, values in outputs.items()}
+        for key in self.reduced:
+            outputs[key] = self.upcast(outputs[key])
 
         return {'xb': branch_input, 'xt': trunk_input, **outputs, 'index': idx}
 
-    def get_trunk(self):
-        return self.transform(self.trunk) if self.transform else self.trunk
+    def get_trunk(self, points=None):
+        """
+        Trunk points, transformed. The full trunk is built once and the same object returned afterwards;
+        subsets ('points', flat point indices) of a 'TrunkGrid' are generated per call.
+        """
+        if points is not None:
+            if self.grid is None:
+                return self._take(self.get_trunk(), np.asarray(points).tolist())
+            trunk = self.grid.rows(points)
+            return self.transform(trunk) if self.transform else trunk
+        if self.trunk is None:
+            self.trunk = self._resident(np.asarray(self.grid))
+        if self.transform and not torch.is_tensor(self.trunk):
+            return self.transform(self.trunk)
+        return self.trunk
+
+    @property
+    def n_points(self):
+        return len(self.grid) if self.grid is not None else len(self.trunk)
+
+    def get_grid(self):
+        """'TrunkGrid' of the trunk points, or None if the trunk was given as an array."""
+        return self.grid
@@ -0,0 +1,126 @@
+import torch
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+LOAD_DIRECTIONS = {'x': 0, 'y': 1, 'z': 2}
+
+def kelvin_displacement(xb, xt, load_direction, direction):
+    """
+    Evaluates one component of Kelvin's solution directly in torch:
+
+    u_i = (F / (16 * π * mu * (1 - nu))) * [ (3 - 4*nu)*δ_{i,d} / r  +  (x_i*x_d) / r³ ]
+
+    Args:
+        xb (Tensor): Branch samples (N, 3) with columns [F, mu, nu].
+        xt (Tensor): Trunk points (n_points, 3) with columns [x, y, z].
+        load_direction (int): Index d of the load direction.
+        direction (int): Index i of the displacement component.
+
+    Returns:
+        Tensor: Displacements of shape (N, n_points), on the device and dtype of the inputs.
+    """
+    F, mu, nu = xb.unbind(dim=1)
+    r = torch.linalg.vector_norm(xt, dim=1)
+    const = F / (16 * torch.pi * mu * (1 - nu))
+    kernel = (xt[:, direction] * xt[:, load_direction] / r ** 3).expand(len(xb), -1)
+    if direction == load_direction:
+        kernel = kernel + (3 - 4 * nu)[:, None] / r
+    return const[:, None] * kernel
+
+class KelvinAnalyticDataset(torch.utils.data.Dataset):
+    def __init__(self, data_params, direction, dtype, device, seed=None, resample_trunk=False):
+        """
+        Kelvin's problem dataset evaluated on the fly on the training device, so no data file is needed.
+        Samples are drawn with the same parameters as 'KelvinsProblemDeterministic' (the *_KELVIN keys
+        of the data generation config), but branch samples are independent uniform draws of (F, mu, nu)
+        instead of a tensor grid. Indexing returns the same dictionaries as 'DeepONetDataset'.
+
+        Args:
+            data_params (dict): Data generation parameters.
+            direction (int): Displacement component used as target.
+            dtype (torch.dtype): Data type of all tensors.
+            device (str): Device where samples are generated.
+            seed (int, optional): Seed of the sampling generator.
+            resample_trunk (bool): If True, 'resample' also draws new random trunk points inside the domain.
+                                   Otherwise the trunk is the fixed grid used by the generator.
+        """
+        self.p = data_params
+        self.direction = direction
+        self.load_direction = LOAD_DIRECTIONS[data_params['LOAD_DIRECTION_KELVIN'].lower()]
+        self.dtype = dtype
+        self.device = device
+        self.resample_trunk = resample_trunk
+        self.output_keys = ['g_u']
+        self.n_outputs = 1
+        self.transform = None
+
+        self.generator = torch.Generator(device=device)
+        if seed is not None:
+            self.generator.manual_seed(seed)
+
+        self.n_samples = data_params['N_F_KELVIN'] * data_params['N_MU_KELVIN'] * data_params['N_NU_KELVIN']
+        self.grid_shape = (data_params['N_X_KELVIN'], data_params['N_Y_KELVIN'], data_params['N_Z_KELVIN'])
+        self.bounds = {
+            'xb': torch.tensor([[data_params['F_MIN_KELVIN'], data_params['F_MAX_KELVIN']],
+                                [data_params['MU_MIN_KELVIN'], data_params['MU_MAX_KELVIN']],
+                                [data_params['NU_MIN_KELVIN'], data_params['NU_MAX_KELVIN']]], dtype=dtype, device=device),
+            'xt': torch.tensor([[data_params['X_MIN_KELVIN'], data_params['X_MAX_KELVIN']],
+                                [data_params['Y_MIN_KELVIN'], data_params['Y_MAX_KELVIN']],
+                                [data_params['Z_MIN_KELVIN'], data_params['Z_MAX_KELVIN']]], dtype=dtype, device=device),
+        }
+
+        self.axes = [torch.linspace(low, high, n, dtype=dtype, device=device)
+                     for (low, high), n in zip(self.bounds['xt'].tolist(), self.grid_shape)]
+        self.trunk = self._grid()
+        self.resample(trunk=False)
+
+        logger.info(f"\nShape of xb:\t{self.branch.shape}")
+        logger.info(f"\nShape of xt:\t{self.trunk.shape}")
+        logger.info(f"Shape of g_u:\t{self.outputs['g_u'].shape}")
+
+    def _grid(self):
+        return torch.stack([m.flatten() for m in torch.meshgrid(*self.axes, indexing='ij')], dim=1)
+
+    def _uniform(self, n, bounds):
+        u = torch.rand((n, len(bounds)), generator=self.generator, dtype=self.dtype, device=self.device)
+        return bounds[:, 0] + u * (bounds[:, 1] - bounds[:, 0])
+
+    def resample(self, trunk=None):
+        """Draws new branch samples (and, if enabled, trunk points) and evaluates their targets."""
+        if trunk is None:
+            trunk = self.resample_trunk
+        self.branch = self._uniform(self.n_samples, self.bounds['xb'])
+        if trunk:
+            self.trunk = self._uniform(len(self.trunk), self.bounds['xt'])
+        self.outputs = {'g_u': kelvin_displacement(self.branch, self.trunk, self.load_direction, self.direction)}
+
+    def __len__(self):
+        return len(self.branch)
+
+    def __getitem__(self, idx):
+        if torch.is_tensor(idx):
+            idx = idx.tolist()
+
+        outputs = {key: self.outputs[key][idx] for key in self.output_keys}
+        return {'xb': self.branch[idx], 'xt': self.trunk, **outputs, 'index': idx}
+
+    def get_trunk(self):
+        return self.trunk
+
+    def save(self, filename):
+        """
+        Saves the current branch samples in the format of 'KelvinsProblemDeterministic.produce_samples'
+        with a scattered design, so models trained on the fly can be tested from 'filename'.
+        The targets are evaluated on the generator grid for the three displacement components,
+        also when the trunk points were resampled during training.
+        """
+        grid = self._grid()
+        g_u = torch.stack([kelvin_displacement(self.branch, grid, self.load_direction, direction)
+                           for direction in LOAD_DIRECTIONS.values()], dim=-1)
+        np.savez(filename,
+                 xb=self.branch.cpu().numpy(), xb_keys=np.array(['F', 'mu', 'nu']),
+                 **{key: axis.cpu().numpy() for key, axis in zip(LOAD_DIRECTIONS, self.axes)},
+                 g_u=g_u.reshape(len(self.branch), *self.grid_shape, 3).cpu().numpy())
+        logger.info(f"Saved {len(self.branch)} on-the-fly samples at {filename}")
@@ -1,4 +1,10 @@
+import os
+import json
+import shutil
+import struct
+import weakref
 import logging
+import zipfile
 import torch
 import numpy as np
 
@@ -9,6 +15,8 @@ class ToTensor:
         self.device = device
 
     def __call__(self, sample):
+        if torch.is_tensor(sample):
+            return sample.to(dtype=self.dtype, device=self.device)
         tensor = torch.tensor(sample, dtype=self.dtype, device=self.device)
         return tensor
     
@@ -99,6 +107,300 @@ class Scaling:
         sigma = torch.as_tensor(self.std, dtype=values.dtype, device=values.device)
         return values * sigma + mu
 
+    @classmethod
+    def from_params(cls, params):
+        """
+        Builds the scaler of one entry of 'NORMALIZATION_PARAMETERS': mean and std if its 'method' is
+        'standard', min and max otherwise.
+        """
+        if params.get('method', 'minmax') == 'standard':
+            return cls(mean=params['mean'], std=params['std'])
+        return cls(min_val=params['min'], max_val=params['max'])
+
+    def scale(self, values):
+        """Normalizes values if min and max were given, standardizes them otherwise."""
+        if self.min_val is not None and self.max_val is not None:
+            return self.normalize(values)
+        return self.standardize(values)
+
+    def unscale(self, values):
+        """Inverse of 'scale'."""
+        if self.min_val is not None and self.max_val is not None:
+            return self.denormalize(values)
+        return self.destandardize(values)
+
+class RunningMoments:
+    def __init__(self):
+        """
+        Count, mean and sum of squared deviations of all values passed to 'update', accumulated chunk
+        by chunk with the pairwise merge of Welford's algorithm (Chan et al.), so a single pass over
+        memory-mapped or streamed data gives the same statistics as one pass over all of it.
+        """
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def merge(self, count, mean, m2):
+        if not count:
+            return
+        mean, m2 = float(mean), float(m2)
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta ** 2 * self.count * count / total
+        self.count = total
+
+    def update(self, values):
+        if isinstance(values, TrunkGrid):
+            for count, mean, m2 in values.moments():
+                self.merge(count, mean, m2)
+            return
+        if isinstance(values, torch.Tensor):
+            values = values.detach().cpu().numpy()
+        values = np.asarray(values, dtype=np.float64)
+        if values.size:
+            mean = values.mean()
+            self.merge(values.size, mean, np.square(values - mean).sum())
+
+    @property
+    def std(self):
+        return float(np.sqrt(self.m2 / self.count)) if self.count else float('nan')
+
+class FactorizedField:
+    def __init__(self, prefactor, kernel):
+        """
+        Read-only array whose rows are products of a scalar prefactor and a kernel, stored separately:
+
+        field[i] = prefactor[i // n_kernels] * kernel[i % n_kernels]
+
+        This matches the row order of an 'ij' meshgrid of the input functions in which the kernel
+        only depends on the last input function (e.g. Kelvin's solution, with prefactor(F, mu) and kernel(nu)).
+        Rows are only built when indexed.
+
+        Args:
+            prefactor (ndarray): Prefactors of any shape, flattened in C order.
+            kernel (ndarray): Kernels, shape (n_kernels, ...).
+        """
+        self.prefactor = np.ravel(prefactor)
+        self.kernel = kernel
+
+    @property
+    def shape(self):
+        return (len(self.prefactor) * len(self.kernel), *self.kernel.shape[1:])
+
+    @property
+    def ndim(self):
+        return self.kernel.ndim
+
+    @property
+    def dtype(self):
+        return np.result_type(self.prefactor, self.kernel)
+
+    @property
+    def nbytes(self):
+        return self.prefactor.nbytes + self.kernel.nbytes
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __getitem__(self, idx):
+        if isinstance(idx, tuple):
+            if idx[0] is not Ellipsis or len(idx) >= self.kernel.ndim:
+                raise IndexError("FactorizedField only supports row indexing and [..., k] component selection.")
+            return FactorizedField(self.prefactor, self.kernel[idx])
+        if isinstance(idx, slice):
+            rows = np.arange(len(self))[idx]
+        else:
+            rows = np.asarray(idx) % len(self)
+        n_kernels = len(self.kernel)
+        prefactor = self.prefactor[rows // n_kernels]
+        return prefactor.reshape(prefactor.shape + (1,) * (self.kernel.ndim - 1)) * self.kernel[rows % n_kernels]
+
+    def reshape(self, *shape):
+        """Reshapes the trailing (point) axes. The number of rows must be kept."""
+        if len(shape) == 1 and isinstance(shape[0], (tuple, list)):
+            shape = tuple(shape[0])
+        if shape[0] not in (len(self), -1):
+            raise ValueError(f"Cannot reshape a FactorizedField of {len(self)} rows to {shape}.")
+        return FactorizedField(self.prefactor, self.kernel.reshape(len(self.kernel), *shape[1:]))
+
+    def __array__(self, dtype=None, copy=None):
+        array = self[:]
+        return array if dtype is None else array.astype(dtype)
+
+class NpyDirectory:
+    def __init__(self, directory, mmap_mode='r'):
+        """
+        Read-only mapping over a dataset stored as a directory of '<key>.npy' files (see 'convert_npz_to_npy_dir').
+        Arrays are opened as memory maps when accessed, so only the parts that are used are read from disk.
+
+        Args:
+            directory (str): Dataset directory.
+            mmap_mode (str): Mode passed to 'np.load'.
+        """
+        self.directory = directory
+        self.mmap_mode = mmap_mode
+        self.files = sorted(os.path.splitext(f)[0] for f in os.listdir(directory) if f.endswith('.npy'))
+
+    def __contains__(self, key):
+        return key in self.files
+
+    def __getitem__(self, key):
+        if key not in self.files:
+            raise KeyError(f"{key} is not a file in the directory {self.directory}")
+        return np.load(os.path.join(self.directory, f"{key}.npy"), mmap_mode=self.mmap_mode)
+
+class NpzMemmap:
+    def __init__(self, npz_filename):
+        """
+        Read-only mapping over an .npz file that memory-maps uncompressed members ('np.savez') in place,
+        so slicing them only reads the selected elements. Compressed or object members are loaded as usual.
+
+        Args:
+            npz_filename (str): Path to the .npz file.
+        """
+        self.filename = npz_filename
+        self.npz = np.load(npz_filename, allow_pickle=True)
+        self.files = self.npz.files
+
+    def __contains__(self, key):
+        return key in self.files
+
+    def __getitem__(self, key):
+        info = self.npz.zip.getinfo(f"{key}.npy")
+        if info.compress_type == zipfile.ZIP_STORED:
+            with open(self.filename, 'rb') as file:
+                # Local file header: 30 fixed bytes, then the file name and extra field.
+                file.seek(info.header_offset)
+                name_length, extra_length = struct.unpack('<HH', file.read(30)[26:30])
+                file.seek(info.header_offset + 30 + name_length + extra_length)
+                version = np.lib.format.read_magic(file)
+                if version == (1, 0):
+                    shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(file)
+                else:
+                    shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(file)
+                offset = file.tell()
+            if not dtype.hasobject and np.prod(shape) > 0:
+                return np.memmap(self.filename, dtype=dtype, mode='r', offset=offset, shape=shape,
+                                 order='F' if fortran_order else 'C')
+        return self.npz[key]
+
+def quantization_report(reference, quantized, chunk_size=None):
+    """
+    Error introduced by storing 'reference' with the precision of 'quantized' (same shape).
+    Arrays are compared in blocks of 'chunk_size' rows, so memory-mapped arrays are read once.
+
+    Returns:
+        dict: dtypes, sizes in bytes, and the maximum absolute, maximum relative (to the largest magnitude)
+              and root-mean-square relative errors.
+    """
+    chunk_size = chunk_size or max(len(reference), 1)
+    max_abs_error = squared_error = squared_norm = max_magnitude = 0.0
+    for begin in range(0, len(reference), chunk_size):
+        exact = np.asarray(reference[begin : begin + chunk_size], dtype=np.complex128 if np.iscomplexobj(reference) else np.float64)
+        error = np.abs(np.asarray(quantized[begin : begin + chunk_size]).astype(exact.dtype) - exact)
+        if error.size:
+            max_abs_error = max(max_abs_error, float(error.max()))
+            max_magnitude = max(max_magnitude, float(np.abs(exact).max()))
+        squared_error += float(np.square(error).sum())
+        squared_norm += float(np.square(np.abs(exact)).sum())
+    return {
+        'dtype': str(reference.dtype),
+        'stored_dtype': str(quantized.dtype),
+        'bytes': int(reference.nbytes),
+        'stored_bytes': int(quantized.nbytes),
+        'max_abs_error': max_abs_error,
+        'max_rel_error': max_abs_error / max_magnitude if max_magnitude else 0.0,
+        'rms_rel_error': float(np.sqrt(squared_error / squared_norm)) if squared_norm else 0.0,
+    }
+
+def reduced_dtype(dtype, precision):
+    """
+    Dtype used to store an array of 'dtype' with the component precision 'precision' ('float64', 'float32'
+    or 'float16'). Complex arrays keep both parts and can't go below 'complex64'.
+    """
+    precision = np.dtype(precision)
+    if precision.kind != 'f':
+        raise ValueError(f"Invalid storage precision '{precision}'. Must be a float dtype.")
+    if np.dtype(dtype).kind == 'c':
+        if precision.itemsize < 4:
+            raise ValueError(f"Complex data can't be stored below complex64 (requested {precision}).")
+        return np.dtype(f'complex{16 * precision.itemsize}')
+    return precision
+
+def complex_as_real(values):
+    """
+    Real view of a complex array or tensor with a trailing (re, im) axis, as 'torch.view_as_real' gives.
+    Nothing is copied: the real and imaginary parts are its [..., 0] and [..., 1] views.
+    """
+    if torch.is_tensor(values):
+        return torch.view_as_real(values)
+    if not np.iscomplexobj(values):
+        raise ValueError(f"Expected a complex array, got {values.dtype}.")
+    return values[..., np.newaxis].view(values.real.dtype)
+
+def complex_from_parts(real, imag):
+    """Complex field with the given real and imaginary parts, written into a single new array."""
+    if torch.is_tensor(real):
+        return torch.complex(real, torch.as_tensor(imag, dtype=real.dtype, device=real.device))
+    values = np.empty(np.shape(real), dtype=np.result_type(real, imag, np.complex64))
+    values.real = real
+    values.imag = imag
+    return values
+
+def convert_npz_to_npy_dir(npz_filename, directory=None, dtype=None, chunk_size=None):
+    """
+    Converts an .npz dataset into a directory of .npy files that can be memory-mapped.
+    The .npy members of the archive are copied as they are, so no array is loaded into memory.
+
+    With 'dtype', the targets ('g_u*' arrays) are instead cast block by block to that precision
+    (complex targets to the complex dtype of the same component precision) and the errors introduced are
+    written to 'quantization_report.json' in the directory. Input functions and coordinates keep their dtype.
+
+    Args:
+        npz_filename (str): Path to the .npz file.
+        directory (str, optional): Output directory. Defaults to the .npz path without extension.
+        dtype (str, optional): Storage precision of the targets ('float32' or 'float16').
+        chunk_size (int, optional): Rows cast per block. Defaults to all rows at once.
+
+    Returns:
+        str: The output directory.
+    """
+    directory = directory or os.path.splitext(npz_filename)[0]
+    os.makedirs(directory, exist_ok=True)
+    report = {}
+    with zipfile.ZipFile(npz_filename) as archive:
+        for member in archive.namelist():
+            if not member.endswith('.npy'):
+                continue
+            key = member[: -len('.npy')]
+            if dtype is not None and key.startswith('g_u'):
+                source = NpzMemmap(npz_filename)[key]
+                if source.dtype.kind in 'fc':
+                    target = np.lib.format.open_memmap(os.path.join(directory, member), mode='w+',
+                                                       dtype=reduced_dtype(source.dtype, dtype), shape=source.shape)
+                    block = chunk_size or max(len(source), 1)
+                    for begin in range(0, len(source), block):
+                        target[begin : begin + block] = source[begin : begin + block]
+                    target.flush()
+                    report[key] = quantization_report(source, target, chunk_size)
+                    logger.info(f"{key}: {report[key]['dtype']} -> {report[key]['stored_dtype']}, "
+                                f"{report[key]['bytes'] / 2**20:.1f} -> {report[key]['stored_bytes'] / 2**20:.1f} MiB, "
+                                f"max. relative error {report[key]['max_rel_error']:.2e}, "
+                                f"RMS relative error {report[key]['rms_rel_error']:.2e}")
+                    if report[key]['rms_rel_error'] > 1e-3:
+                        logger.warning(f"{key} loses {report[key]['rms_rel_error']:.1%} (RMS) in {target.dtype}: its values are "
+                                       f"too small or too spread for this precision. Consider a wider dtype.")
+                    del target
+                    continue
+            with archive.open(member) as source, open(os.path.join(directory, member), 'wb') as target:
+                shutil.copyfileobj(source, target, length=2**24)
+    if report:
+        with open(os.path.join(directory, 'quantization_report.json'), 'w') as file:
+            json.dump(report, file, indent=4)
+    logger.info(f"Converted {npz_filename} to {directory}")
+    return directory
+
 def preprocess_npz_data(npz_filename, input_function_keys, coordinate_keys, **kwargs):
     """
     Loads data from an npz file and groups the input functions and coordinates into tuples
@@ -109,43 +411,83 @@ def preprocess_npz_data(npz_filename, input_function_keys, coordinate_keys, **kw
         These may have different lengths. The function creates a meshgrid from these arrays
         (using 'ij' indexing) and then flattens the resulting arrays column‐wise to obtain a
         2D array of shape (num_sensor_points, num_sensor_dimensions).
+        Scattered samples can instead be stored already flattened under 'xb', with their column
+        names under 'xb_keys', in which case the columns are taken in the order of input_function_keys.
       - The coordinate arrays (for the trunk) are stored under keys given by coordinate_keys.
-        Again, a meshgrid is created and then flattened to yield a 2D array of shape
-        (num_coordinate_points, num_coordinate_dimensions).
+        They are kept as a 'TrunkGrid', which stands for the flattened 'ij' meshgrid of shape
+        (num_coordinate_points, num_coordinate_dimensions) without building it.
       - Optionally, if the .npz file contains an operator output under the key 'g_u', it is also included.
+        Factorized files ('g_u_prefactor' and 'g_u_kernel', see 'KelvinsProblemDeterministic') are
+        returned as a 'FactorizedField' that rebuilds rows on access.
     
     Args:
-        npz_filename (str): Path to the .npz file.
+        npz_filename (str): Path to the .npz file, or to a directory of .npy files ('convert_npz_to_npy_dir').
+                            Directories are memory-mapped, so 'g_u' is only read where it is indexed.
         input_function_keys (list of str): List of keys for sensor (input function) arrays.
         coordinate_keys (list of str): List of keys for coordinate arrays.
+        direction (int, optional): Displacement component kept from a (..., 3) 'g_u'.
+        output_keys (list of str, optional): Targets that will be used. Only these are read into memory;
+                                             the others are returned as memory-mapped views.
+        lazy (bool, optional): If True, targets of uncompressed .npz files are also left as memory-mapped views.
     
     Returns:
         dict: A dictionary with the following keys:
             - 'xb': A 2D numpy array of shape (num_sensor_points, num_sensor_dimensions).
-            - 'xt': A 2D numpy array of shape (num_coordinate_points, num_coordinate_dimensions).
+            - 'xt': A 'TrunkGrid' of the coordinate axes (num_coordinate_points rows of num_coordinate_dimensions).
             - 'g_u': (if present) the operator output array.
     """
 
     desired_direction = kwargs.get('direction')
-    data = np.load(npz_filename, allow_pickle=True)
-    
-    input_funcs = [data[key] for key in input_function_keys]
-    sensor_mesh = np.meshgrid(*input_funcs, indexing='ij')
-    xb = np.column_stack([m.flatten() for m in sensor_mesh])
+    output_keys = kwargs.get('output_keys')
+    lazy = kwargs.get('lazy', False)
+    if os.path.isdir(npz_filename):
+        data = NpyDirectory(npz_filename)
+    else:
+        data = NpzMemmap(npz_filename)
+    
+    if 'xb' in data:
+        xb = np.array(data['xb'])
+        if 'xb_keys' in data:
+            xb_keys = list(data['xb_keys'])
+            missing = [key for key in input_function_keys if key not in xb_keys]
+            if missing:
+                raise ValueError(f"Input function keys {missing} not found in 'xb_keys' {xb_keys}.")
+            xb = xb[:, [xb_keys.index(key) for key in input_function_keys]]
+    else:
+        input_funcs = [data[key] for key in input_function_keys]
+        sensor_mesh = np.meshgrid(*input_funcs, indexing='ij')
+        xb = np.column_stack([m.flatten() for m in sensor_mesh])
 
     if xb.ndim == 1:
         xb = xb.reshape(len(xb), -1)
     
-    coords = [data[key] for key in coordinate_keys]
-    coord_mesh = np.meshgrid(*coords, indexing='ij')
-    xt = np.column_stack([m.flatten() for m in coord_mesh])
+    xt = TrunkGrid([data[key] for key in coordinate_keys], names=coordinate_keys)
     
     result = {'xb': xb, 'xt': xt}
     if 'g_u' in data:
+        # Direction and real/imaginary parts are selected on memory-mapped views, so only
+        # the selected components are read. Directory datasets stay memory-mapped.
         result['g_u'] = data['g_u']
+        in_memory = not lazy and not isinstance(data, NpyDirectory)
         if np.iscomplexobj(result['g_u']):
-            result["g_u_real"] = result["g_u"].real
-            result["g_u_imag"] = result["g_u"].imag
+            complex_keys = {'g_u', 'g_u_real', 'g_u_imag'}
+            if in_memory and (output_keys is None or complex_keys & set(output_keys)):
+                # A single in-memory copy; compressed members are already loaded and kept as they are.
+                if isinstance(result['g_u'], np.memmap) or not result['g_u'].flags.c_contiguous:
+                    result['g_u'] = np.array(result['g_u'])
+            # Both parts are views of one (..., 2) real array instead of two copies.
+            parts = complex_as_real(result['g_u'])
+            result["g_u_real"] = parts[..., 0]
+            result["g_u_imag"] = parts[..., 1]
+        if desired_direction:
+            result['g_u'] = result['g_u'][..., desired_direction]
+        if in_memory and not np.iscomplexobj(result['g_u']) and (output_keys is None or 'g_u' in output_keys):
+            # Contiguous in-memory copy of the selected direction.
+            result['g_u'] = np.array(result['g_u'])
+    elif 'g_u_prefactor' in data and 'g_u_kernel' in data:
+        result['g_u'] = FactorizedField(data['g_u_prefactor'], data['g_u_kernel'])
+        if len(result['g_u']) != len(xb):
+            raise ValueError(f"Factorized target has {len(result['g_u'])} rows but there are {len(xb)} input functions.")
         if desired_direction:
             result['g_u'] = result['g_u'][..., desired_direction]
     else:
@@ -153,45 +495,195 @@ def preprocess_npz_data(npz_filename, input_function_keys, coordinate_keys, **kw
     
     return result
 
-def get_minmax_norm_params(dataset, keys=None):
+NORMALIZATION_METHODS = ('minmax', 'standard')
+
+def get_norm_params(dataset, methods=None, keys=None, chunk_size=None):
     """
-    Compute min-max normalization parameters for specified keys in the dataset.
+    Compute normalization parameters for specified keys in the dataset.
+
+    The statistics are computed on the raw arrays of the dataset ('branch' and 'outputs') with one
+    vectorized pass over the selected rows, or over blocks of 'chunk_size' rows for memory-mapped or
+    lazily built data. The trunk is read once, or only its axes for a 'TrunkGrid'. Datasets without raw arrays are read through batched indexing.
+    Means and standard deviations are accumulated with 'RunningMoments', so chunked passes give the
+    same values as a single one.
 
     Args:
         dataset (torch.utils.data.Dataset or torch.utils.data.Subset): Dataset or subset.
+        methods (dict, optional): 'minmax' (default) or 'standard' for each key.
         keys (list of str, optional): Keys to normalize. If None, includes 'xb', 'xt', and all outputs.
+        chunk_size (int, optional): Number of rows per pass. Defaults to all rows at once.
 
     Returns:
-        dict: Dictionary containing min and max values for each key.
+        dict: For each key, its 'method' with 'min' and 'max' ('minmax') or 'mean' and 'std' ('standard').
     """
     if isinstance(dataset, torch.utils.data.Subset):
         original_dataset = dataset.dataset
-        indices = dataset.indices
+        indices = np.sort(np.asarray(dataset.indices, dtype=int))
     else:
         original_dataset = dataset
-        indices = range(len(dataset))
+        indices = np.arange(len(dataset))
 
     if keys is None:
         keys = ['xb', 'xt'] + getattr(original_dataset, 'output_keys', [])
+    methods = {key: (methods or {}).get(key, 'minmax') for key in keys}
+    for key, method in methods.items():
+        if method not in NORMALIZATION_METHODS:
+            raise ValueError(f"Unknown normalization method '{method}' for '{key}'. Use one of {NORMALIZATION_METHODS}.")
+
+    min_max_params = {key: {'min': float('inf'), 'max': -float('inf')} for key in keys if methods[key] == 'minmax'}
+    moments = {key: RunningMoments() for key in keys if methods[key] == 'standard'}
+
+    def update(key, values):
+        if key in moments:
+            moments[key].update(values)
+            return
+        if isinstance(values, TrunkGrid):
+            values = np.array([values.min(), values.max()])
+        elif isinstance(values, torch.Tensor):
+            values = values.detach().cpu().numpy()
+        if np.size(values):
+            # Python floats: numpy scalars of reduced-precision data don't serialize to YAML as numbers.
+            min_max_params[key]['min'] = min(min_max_params[key]['min'], float(np.min(values)))
+            min_max_params[key]['max'] = max(min_max_params[key]['max'], float(np.max(values)))
+
+    if 'xt' in keys:
+        grid = original_dataset.get_grid() if hasattr(original_dataset, 'get_grid') else None
+        update('xt', grid if grid is not None else original_dataset.get_trunk())
+
+    row_keys = [key for key in keys if key != 'xt']
+    raw = hasattr(original_dataset, 'branch') and hasattr(original_dataset, 'outputs')
+    chunk_size = chunk_size or max(len(indices), 1)
+    for begin in range(0, len(indices), chunk_size):
+        rows = indices[begin : begin + chunk_size]
+        if raw:
+            batch = {key: original_dataset.branch[rows] if key == 'xb' else original_dataset.outputs[key][rows]
+                     for key in row_keys}
+        else:
+            batch = original_dataset[rows.tolist()]
+        for key in row_keys:
+            update(key, batch[key])
+
+    params = {}
+    for key in keys:
+        if key in moments:
+            params[key] = {'method': 'standard', 'mean': float(moments[key].mean), 'std': moments[key].std}
+        else:
+            params[key] = {'method': 'minmax', **min_max_params[key]}
+    return params
+
+def get_minmax_norm_params(dataset, keys=None, chunk_size=None):
+    """
+    Compute min-max normalization parameters for specified keys in the dataset (see 'get_norm_params').
+
+    Args:
+        dataset (torch.utils.data.Dataset or torch.utils.data.Subset): Dataset or subset.
+        keys (list of str, optional): Keys to normalize. If None, includes 'xb', 'xt', and all outputs.
+        chunk_size (int, optional): Number of rows per pass. Defaults to all rows at once.
+
+    Returns:
+        dict: Dictionary containing min and max values for each key.
+    """
+    params = get_norm_params(dataset, keys=keys, chunk_size=chunk_size)
+    return {key: {'min': values['min'], 'max': values['max']} for key, values in params.items()}
+
+class TrunkGrid:
+    def __init__(self, axes, names=None):
+        """
+        Tensor-product grid of trunk points, stored as its 1D coordinate axes only.
+
+        Point k of the grid is the k-th row of 'meshgrid_to_don(*axes)' ('ij' indexing, last axis
+        varying fastest). Rows and blocks of rows are generated from the axes on demand, and reshapes of
+        fields over the points, axis lookups and the min/max and moments of the trunk only need the axis
+        lengths and values. 'np.asarray(grid)' builds the full (n_points, d) trunk when it is needed.
 
-    min_max_params = {key: {'min': float('inf'), 'max': -float('inf')} for key in keys}
+        Args:
+            axes (list of array-like): 1D coordinate arrays, one per dimension.
+            names (list of str, optional): Coordinate keys of the axes (e.g. COORDINATE_KEYS).
+        """
+        self.axes = tuple(np.asarray(axis).reshape(-1) for axis in axes)
+        self.names = list(names) if names is not None else None
+        if self.names is not None and len(self.names) != len(self.axes):
+            raise ValueError(f"Got {len(self.names)} names for {len(self.axes)} coordinate axes.")
+
+    @property
+    def shape(self):
+        """Number of values along each axis."""
+        return tuple(len(axis) for axis in self.axes)
+
+    def __len__(self):
+        return int(np.prod(self.shape))
+
+    def index(self, key):
+        """Position of the axis named 'key' (or 'key' itself if it is an integer)."""
+        if isinstance(key, (int, np.integer)):
+            return int(key)
+        if self.names is None or key not in self.names:
+            raise ValueError(f"Unknown coordinate '{key}'. Grid axes are {self.names}.")
+        return self.names.index(key)
+
+    def axis(self, key):
+        """1D coordinate values of the axis 'key' (name or position)."""
+        return self.axes[self.index(key)]
+
+    def rows(self, points=None):
+        """
+        Trunk rows of the given points, generated from the axes.
 
-    for idx in indices:
-        sample = original_dataset[idx]
+        Args:
+            points (int, slice or array-like, optional): Flat point indices. All points if None.
 
-        for key in keys:
-            if key == 'xt':
-                values = original_dataset.get_trunk()
-            else:
-                values = sample[key]
+        Returns:
+            numpy.ndarray: (len(points), d) array, or (d,) for a single point.
+        """
+        if points is None:
+            points = slice(None)
+        if isinstance(points, slice):
+            points = np.arange(*points.indices(len(self)))
+        elif torch.is_tensor(points):
+            points = points.detach().cpu().numpy()
+        multi_index = np.unravel_index(points, self.shape)
+        return np.stack([axis[i] for axis, i in zip(self.axes, multi_index)], axis=-1)
+
+    def __getitem__(self, points):
+        return self.rows(points)
+
+    def blocks(self, block_size):
+        """Yields the trunk rows in consecutive blocks of at most 'block_size' points."""
+        for begin in range(0, len(self), block_size):
+            yield self.rows(slice(begin, begin + block_size))
+
+    def reshape(self, values, axis=-1):
+        """
+        Reshapes the point axis of 'values' (e.g. (N, n_points) outputs) into the grid shape.
 
-            if isinstance(values, torch.Tensor):
-                values = values.detach().cpu().numpy()
+        Args:
+            values (numpy.ndarray or torch.Tensor): Field over the grid points.
+            axis (int): Position of the point axis.
+        """
+        axis = axis % values.ndim
+        if values.shape[axis] != len(self):
+            raise ValueError(f"Point axis has {values.shape[axis]} entries but the grid has {len(self)} points.")
+        return values.reshape(*values.shape[:axis], *self.shape, *values.shape[axis + 1:])
 
-            min_max_params[key]['min'] = min(min_max_params[key]['min'], np.min(values))
-            min_max_params[key]['max'] = max(min_max_params[key]['max'], np.max(values))
+    def __array__(self, dtype=None, copy=None):
+        data = meshgrid_to_don(*self.axes)
+        return data if dtype is None else data.astype(dtype, copy=False)
 
-    return min_max_params
+    def min(self):
+        return float(min(axis.min() for axis in self.axes))
+
+    def max(self):
+        return float(max(axis.max() for axis in self.axes))
+
+    def moments(self):
+        """
+        (count, mean, m2) of the values of each trunk column, as merged by 'RunningMoments'. Every value
+        of an axis appears len(grid) / len(axis) times in its column.
+        """
+        n_points = len(self)
+        for axis in self.axes:
+            mean = axis.mean()
+            yield n_points, mean, n_points // len(axis) * np.square(axis - mean).sum()
 
 def don_to_meshgrid(arr):
     """
@@ -203,13 +695,16 @@ def don_to_meshgrid(arr):
     
     Returns a tuple of d 1D arrays containing the unique coordinate values for each dimension.
     For example, for a 2D case it returns (r, z); for a 3D case, (x, y, z).
+    A 'TrunkGrid' returns its axes directly.
     
     Args:
-        arr (numpy.ndarray): Trunk array of shape (N, d).
+        arr (numpy.ndarray or TrunkGrid): Trunk array of shape (N, d).
     
     Returns:
         tuple: A tuple of d 1D numpy arrays corresponding to the coordinates.
     """
+    if isinstance(arr, TrunkGrid):
+        return arr.axes
     d = arr.shape[1]
     coords = tuple(np.unique(arr[:, i]) for i in range(d))
     return coords
@@ -255,7 +750,7 @@ def reshape_outputs_to_plot_format(output, coords, basis=False):
         output (Tensor or ndarray): The network output, with shape either
             (branch_data.shape[0], trunk_size) or 
             (branch_data.shape[0], trunk_size, n_basis).
-        coords (tuple or list or ndarray): The coordinate arrays that were
+        coords (tuple or list or ndarray or TrunkGrid): The coordinate arrays that were
             used to generate the trunk. If multiple coordinate arrays are provided,
             they should be in a tuple/list (e.g. (x_values, y_values, z_values)).
             If a single array is provided, it is assumed to be 1D.
@@ -266,7 +761,9 @@ def reshape_outputs_to_plot_format(output, coords, basis=False):
             For a 2D problem with a single basis, for example, the output shape
             will be (N_branch, 1, len(coord1), len(coord2)).
     """
-    if isinstance(coords, (list, tuple)):
+    if isinstance(coords, TrunkGrid):
+        grid_shape = coords.shape
+    elif isinstance(coords, (list, tuple)):
         grid_shape = tuple(len(c) for c in coords)
     else:
         grid_shape = (len(coords),)
@@ -274,7 +771,10 @@ def reshape_outputs_to_plot_format(output, coords, basis=False):
     if isinstance(output, torch.Tensor):
         output = output.detach().cpu().numpy()
 
-    if output.ndim == 2:
+    if isinstance(coords, TrunkGrid) and (output.ndim == 2 or (output.ndim == 3 and basis)):
+        # (N_branch, trunk_size) or (N_branch, n_basis, trunk_size): the points are the last axis.
+        reshaped = coords.reshape(output if output.ndim == 3 else output[:, None])
+    elif output.ndim == 2:
         N_branch, trunk_size = output.shape
         if np.prod(grid_shape) != trunk_size and not basis:
             raise ValueError("Mismatch between trunk size and product of coordinate lengths.")
@@ -294,15 +794,63 @@ def reshape_outputs_to_plot_format(output, coords, basis=False):
     
     return reshaped
 
-def trunk_feature_expansion(xt, p):
-    expansion_features = [xt]
-    if p:
-        for k in range(1, p + 1):
-            expansion_features.append(torch.sin(k * torch.pi * xt))
-            expansion_features.append(torch.cos(k * torch.pi * xt))
+class TrunkFeatureExpansion:
+    def __init__(self, n_features):
+        """
+        Expands trunk points 'x' into [x, sin(pi x), cos(pi x), ..., sin(p pi x), cos(p pi x)] (p = 'n_features').
+
+        Only sin(pi x) and cos(pi x) are evaluated; the higher harmonics follow from the angle-addition
+        recurrence, written into one preallocated buffer. Results are memoized per trunk tensor (by identity
+        and version), so expanding the same trunk again returns the stored features. Trunks that require
+        gradients are expanded directly and not memoized.
 
-    trunk_features = torch.concat(expansion_features, axis=1)
-    return trunk_features
+        Args:
+            n_features (int): Number of harmonics p.
+        """
+        self.n_features = n_features
+        self.cache = {}
+
+    def expand(self, xt):
+        p = self.n_features
+        n, d = xt.shape
+        if xt.requires_grad:
+            harmonics = [f(k * torch.pi * xt) for k in range(1, p + 1) for f in (torch.sin, torch.cos)]
+            return torch.concat([xt, *harmonics], axis=1)
+        with torch.no_grad():
+            # Harmonic-major buffer, so every recurrence step works on contiguous blocks.
+            features = torch.empty((1 + 2 * p, n, d), dtype=xt.dtype, device=xt.device)
+            features[0] = xt
+            if p:
+                s1, c1 = features[1], features[2]
+                torch.sin(torch.pi * xt, out=s1)
+                torch.cos(torch.pi * xt, out=c1)
+                for k in range(1, p):
+                    s, c = features[2 * k - 1], features[2 * k]
+                    # sin((k+1)a) = sin(ka)cos(a) + cos(ka)sin(a), cos((k+1)a) = cos(ka)cos(a) - sin(ka)sin(a)
+                    torch.mul(s, c1, out=features[2 * k + 1]).addcmul_(c, s1)
+                    torch.mul(c, c1, out=features[2 * k + 2]).addcmul_(s, s1, value=-1)
+            return features.permute(1, 0, 2).reshape(n, (1 + 2 * p) * d)
+
+    def __call__(self, xt):
+        for key in [key for key, (ref, _, _) in self.cache.items() if ref() is None]:
+            del self.cache[key]
+
+        if xt.requires_grad:
+            return self.expand(xt)
+        cached = self.cache.get(id(xt))
+        if cached is not None and cached[0]() is xt and cached[1] == xt._version:
+            return cached[2]
+        trunk_features = self.expand(xt)
+        self.cache[id(xt)] = (weakref.ref(xt), xt._version, trunk_features)
+        return trunk_features
+
+# One memoizing expansion per number of harmonics, shared by every 'trunk_feature_expansion' call.
+_TRUNK_FEATURE_EXPANSIONS = {}
+
+def trunk_feature_expansion(xt, p):
+    if p not in _TRUNK_FEATURE_EXPANSIONS:
+        _TRUNK_FEATURE_EXPANSIONS[p] = TrunkFeatureExpansion(p)
+    return _TRUNK_FEATURE_EXPANSIONS[p](xt)
 
 def mirror(arr):
     arr_flip = np.flip(arr[1 : , : ], axis=1)
@@ -342,19 +890,16 @@ def format_param(param, param_keys=None):
     else:
         return str(param)
     
-def postprocess_for_2D_plot(model, plot_config, model_config, branch_features, trunk_features, ground_truth, preds):
+def postprocess_for_2D_plot(model, plot_config, model_config, branch_features, trunk_features, ground_truth, preds, trunk_grid=None):
     processed_data = {}
 
     # -------------- Prepare branch data --------------
 
     xb_keys = model_config["INPUT_FUNCTION_KEYS"]
 
-    xb_scaler = Scaling(
-        min_val=model_config['NORMALIZATION_PARAMETERS']['xb']['min'],
-        max_val=model_config['NORMALIZATION_PARAMETERS']['xb']['max']
-    )
+    xb_scaler = Scaling.from_params(model_config['NORMALIZATION_PARAMETERS']['xb'])
     if model_config['INPUT_NORMALIZATION']:
-        branch_features = xb_scaler.denormalize(branch_features)
+        branch_features = xb_scaler.unscale(branch_features)
     branch_tuple = don_to_meshgrid(branch_features)
     branch_map = {k:v for k, v in zip(xb_keys, branch_tuple)}
     processed_data["branch_features"] = np.array(branch_features)
@@ -362,24 +907,25 @@ def postprocess_for_2D_plot(model, plot_config, model_config, branch_features, t
 
     # -------------- Prepare trunk data --------------
 
-    xt_scaler = Scaling(
-        min_val=model_config['NORMALIZATION_PARAMETERS']['xt']['min'],
-        max_val=model_config['NORMALIZATION_PARAMETERS']['xt']['max']
-    )
+    xt_scaler = Scaling.from_params(model_config['NORMALIZATION_PARAMETERS']['xt'])
     xt_plot = trunk_features
     if model_config['TRUNK_FEATURE_EXPANSION']:
         xt_plot = xt_plot[:, : xt_plot.shape[-1] // (1 + 2 * model_config['TRUNK_EXPANSION_FEATURES_NUMBER'])]
     if model_config['INPUT_NORMALIZATION']:
-        xt_plot = xt_scaler.denormalize(xt_plot)
+        xt_plot = xt_scaler.unscale(xt_plot)
 
     if "COORDINATE_KEYS" not in model_config:
         raise ValueError("COORDINATE_KEYS must be provided in the configuration.")
     coordinate_keys = model_config["COORDINATE_KEYS"]  # e.g., ["x", "y", "z"]
-    coords_tuple = don_to_meshgrid(xt_plot)
+    # The axes of the grid spec are exact; recovering them from the trunk needs a sort per column.
+    coords_tuple = don_to_meshgrid(trunk_grid if trunk_grid is not None else xt_plot)
     if len(coords_tuple) != len(coordinate_keys):
         raise ValueError("Mismatch between number of coordinates in trunk data and COORDINATE_KEYS.")
     
-    coordinates_map = {k: v for k, v in zip(coordinate_keys, coords_tuple)}
+    if trunk_grid is not None and trunk_grid.names is not None:
+        coordinates_map = {k: trunk_grid.axis(k) for k in coordinate_keys}
+    else:
+        coordinates_map = {k: v for k, v in zip(coordinate_keys, coords_tuple)}
     coord_index_map = {coord: index for index, coord in enumerate(coordinates_map)}
     coords_2D_index_map = {k: v for k, v in coord_index_map.items() if k in plot_config["AXES_TO_PLOT"]}
 
@@ -403,18 +949,19 @@ def postprocess_for_2D_plot(model, plot_config, model_config, branch_features, t
 
     output_keys = model_config["OUTPUT_KEYS"]
     if len(output_keys) == 2:
-        truth_field = ground_truth[output_keys[0]] + ground_truth[output_keys[1]] * 1j
-        pred_field = preds[output_keys[0]] + preds[output_keys[1]] * 1j
+        truth_field = complex_from_parts(ground_truth[output_keys[0]], ground_truth[output_keys[1]])
+        pred_field = complex_from_parts(preds[output_keys[0]], preds[output_keys[1]])
     else:
         truth_field = ground_truth[output_keys[0]]
         pred_field = preds[output_keys[0]]
 
-    truth_field = reshape_outputs_to_plot_format(truth_field, coords_tuple)
-    pred_field = reshape_outputs_to_plot_format(pred_field, coords_tuple)
+    grid_spec = trunk_grid if trunk_grid is not None else coords_tuple
+    truth_field = reshape_outputs_to_plot_format(truth_field, grid_spec)
+    pred_field = reshape_outputs_to_plot_format(pred_field, grid_spec)
 
     trunk_output = model.training_strategy.get_basis_functions(xt=trunk_features, model=model)
     # branch_output = model.training_strategy.get_coefficients(xb=branch_features, model=model)
-    basis_modes = reshape_outputs_to_plot_format(trunk_output, coords_tuple, basis=True)
+    basis_modes = reshape_outputs_to_plot_format(trunk_output, grid_spec, basis=True)
     # coeff_modes = reshape_outputs_to_plot_format(branch_output, branch_tuple, basis=True) # Need to implement a 'plot coeffs' function for the future
     
     if basis_modes.ndim < 4:
@@ -0,0 +1,119 @@
+import queue
+import torch
+import logging
+import threading
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class ShardedDeepONetDataset(torch.utils.data.IterableDataset):
+    def __init__(self, dataset, indices, batch_size, shard_size, read_ahead=2, seed=None, shuffle=True):
+        """
+        Iterable view over the 'indices' rows of a 'DeepONetDataset' whose targets stay on disk
+        (memory-mapped directories or uncompressed .npz files loaded with 'lazy=True').
+
+        The rows are grouped in shards of 'shard_size' consecutive dataset rows. A background thread reads
+        one shard at a time, shuffles it and splits it into batches of 'batch_size' samples, keeping at most
+        'read_ahead' shards in memory ahead of the consumer. Each pass visits the shards in a new order,
+        drawn from a generator seeded once. Normalization parameters must be computed beforehand
+        (e.g. 'get_minmax_norm_params' with 'chunk_size').
+
+        Args:
+            dataset (DeepONetDataset): Dataset the rows are read from.
+            indices (list): Dataset indices included in the passes (e.g. a split).
+            batch_size (int): Samples per batch.
+            shard_size (int): Consecutive dataset rows read from disk at once.
+            read_ahead (int): Shards read and batched ahead of the consumer.
+            seed (int, optional): Seed of the shuffling generator.
+            shuffle (bool): If False, shards and samples are visited in dataset order.
+        """
+        self.dataset = dataset
+        self.indices = indices
+        self.batch_size = batch_size
+        self.shard_size = shard_size
+        self.read_ahead = read_ahead
+        self.shuffle = shuffle
+        self.rng = np.random.default_rng(seed)
+
+    def _shards(self):
+        indices = np.sort(np.asarray(self.indices, dtype=int))
+        bounds = np.searchsorted(indices, np.arange(0, len(self.dataset) + self.shard_size, self.shard_size))
+        shards = [indices[begin : end] for begin, end in zip(bounds[:-1], bounds[1:]) if end > begin]
+
+        worker = torch.utils.data.get_worker_info()
+        if worker is not None:
+            shards = shards[worker.id :: worker.num_workers]
+        return shards
+
+    @staticmethod
+    def _put(buffer, item, stop):
+        """Puts 'item' in the buffer unless the consumer stopped. Returns False if it did."""
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _read(self, shards, transform, buffer, stop):
+        try:
+            for rows in shards:
+                if self.shuffle:
+                    rows = self.rng.permutation(rows)
+                samples = self.dataset[rows.tolist()]
+                batches = []
+                for begin in range(0, len(rows), self.batch_size):
+                    batch = {key: value[begin : begin + self.batch_size]
+                             for key, value in samples.items() if key != 'xt'}
+                    batch['xt'] = samples['xt']
+                    batches.append(transform(batch) if transform else batch)
+                if not self._put(buffer, batches, stop):
+                    return
+            self._put(buffer, None, stop)
+        except Exception as error:
+            self._put(buffer, error, stop)
+
+    def epoch(self, transform=None, rows=True, points=True):
+        """
+        Yields the batches of one pass over the shards.
+
+        Args:
+            transform (callable, optional): Applied to every batch in the reading thread.
+            rows (bool): Must be True: the shards are never held in memory all at once.
+            points (bool): Must be True: every batch holds all trunk points.
+        """
+        if not (rows and points):
+            raise ValueError("Sharded datasets are read in batches of samples over all trunk points.")
+
+        shards = self._shards()
+        if self.shuffle:
+            shards = [shards[k] for k in self.rng.permutation(len(shards))]
+
+        buffer = queue.Queue(maxsize=self.read_ahead)
+        stop = threading.Event()
+        reader = threading.Thread(target=self._read, args=(shards, transform, buffer, stop), daemon=True)
+        reader.start()
+        try:
+            while True:
+                batches = buffer.get()
+                if batches is None:
+                    break
+                if isinstance(batches, Exception):
+                    raise batches
+                yield from batches
+        finally:
+            stop.set()
+            reader.join()
+
+    def __iter__(self):
+        return self.epoch()
+
+    def __len__(self):
+        return sum(-(-len(rows) // self.batch_size) for rows in self._shards())
+
+    def get_trunk(self):
+        return self.dataset.get_trunk()
+
+    def get_grid(self):
+        return self.dataset.get_grid()
@@ -0,0 +1,220 @@
+import queue
+import torch
+import logging
+import multiprocessing
+import numpy as np
+from .preprocessing import TrunkGrid, RunningMoments, complex_as_real
+
+logger = logging.getLogger(__name__)
+
+SPLITS = ('train', 'val', 'test')
+
+class StreamingDynamicDataset(torch.utils.data.Dataset):
+    def __init__(self, problem, output_keys, split, transform=None, producers=1, chunk_size=1, queue_size=8, norm_methods=None):
+        """
+        Dynamic problem dataset that grows while it is being generated. Producer processes integrate
+        the frequencies drawn by 'problem' and push finished chunks into a bounded queue; 'poll' moves
+        them into the dataset. Indexing returns the same dictionaries as 'DeepONetDataset'.
+
+        Every arriving sample is assigned to the split that is furthest below its share, so the split
+        index lists (and any 'Subset' built on them) grow together. Min-max statistics, or running means
+        and standard deviations, of the training rows are updated as samples arrive.
+
+        Args:
+            problem (DynamicFixedMaterialProblem): Configured problem. Each producer uses its 'workers',
+                                                   which must run in a 'thread' pool when more than one.
+            output_keys (list of str): Keys of the targets ('g_u', 'g_u_real' or 'g_u_imag').
+            split (tuple): (train, val, test) fractions.
+            transform (callable, optional): Transformation applied to all fields.
+            producers (int): Number of producer processes.
+            chunk_size (int): Frequencies integrated per queued chunk.
+            queue_size (int): Maximum number of chunks waiting in the queue. Producers block while it is full.
+            norm_methods (dict, optional): 'minmax' (default) or 'standard' for each key, as in 'get_norm_params'.
+        """
+        self.problem = problem
+        self.output_keys = output_keys
+        self.n_outputs = len(output_keys)
+        self.transform = transform
+        self.fractions = np.array(split, dtype=float)
+
+        self.r, self.z = problem._get_coordinates()
+        _, delta = problem._get_input_functions()
+        self.grid = TrunkGrid((self.r, self.z), names=('r', 'z'))
+        self.trunk = None
+        self.capacity = len(delta)
+        self.n_samples = 0
+
+        self.delta = np.empty(self.capacity)
+        g_u = np.empty((self.capacity, len(self.grid)), dtype=complex)
+        parts = complex_as_real(g_u)
+        self.data = {'g_u': g_u, 'g_u_real': parts[..., 0], 'g_u_imag': parts[..., 1]}
+        for key in self.output_keys:
+            if key not in self.data:
+                raise ValueError(f"Output key '{key}' not found in data.")
+        self.outputs = {key: self.data[key] for key in self.output_keys}
+        # Transformed copies of the branch and targets, filled as samples arrive so indexing doesn't transform.
+        self.resident = {}
+        self.indices = {name: [] for name in SPLITS}
+        self.norm_methods = {key: (norm_methods or {}).get(key, 'minmax') for key in ['xb', 'xt', *self.output_keys]}
+        self.norm_params = {key: {'min': float('inf'), 'max': -float('inf')} for key in ['xb', *self.output_keys]}
+        self.norm_params['xt'] = {'min': self.grid.min(), 'max': self.grid.max()}
+        self.moments = {key: RunningMoments() for key, method in self.norm_methods.items() if method == 'standard'}
+        if 'xt' in self.moments:
+            self.moments['xt'].update(self.grid)
+
+        # Spawned rather than forked, so producers don't inherit the trainer's torch threads. They are
+        # daemonic, so they stop with the trainer (and can only use thread pools themselves).
+        context = multiprocessing.get_context('spawn')
+        self.queue = context.Queue(maxsize=queue_size)
+        self.producers = [context.Process(target=problem.stream_samples,
+                                          args=(delta[k::producers], self.r, self.z, chunk_size, self.queue),
+                                          daemon=True)
+                          for k in range(producers)]
+        for process in self.producers:
+            process.start()
+        self.n_running = producers
+        logger.info(f"Started {producers} producer(s) for {self.capacity} frequencies "
+                    f"({chunk_size} per chunk, queue of {queue_size} chunks)")
+
+    @property
+    def branch(self):
+        return self.delta[:self.n_samples, None]
+
+    @property
+    def complete(self):
+        return self.n_running == 0
+
+    def poll(self, block=False, timeout=None):
+        """
+        Moves the chunks waiting in the queue into the dataset.
+
+        Args:
+            block (bool): If True, waits up to 'timeout' seconds for the first chunk.
+
+        Returns:
+            int: Number of samples added.
+        """
+        added = 0
+        while self.n_running:
+            try:
+                item = self.queue.get(block=block and not added, timeout=timeout)
+            except queue.Empty:
+                if block and not added and not any(process.is_alive() for process in self.producers):
+                    raise RuntimeError(f"Producers stopped after {self.n_samples}/{self.capacity} samples.")
+                break
+            if item is None:
+                self.n_running -= 1
+                continue
+            added += self._append(*item)
+        return added
+
+    def wait_for(self, n_samples):
+        """Blocks until at least 'n_samples' samples (or all of them) have arrived."""
+        while self.n_samples < min(n_samples, self.capacity) and not self.complete:
+            self.poll(block=True, timeout=60)
+
+    def _append(self, freqs, wd):
+        rows = range(self.n_samples, self.n_samples + len(freqs))
+        self.delta[rows.start:rows.stop] = freqs
+        self.data['g_u'][rows.start:rows.stop] = wd.reshape(len(freqs), -1)
+        if self.transform:
+            self._store(rows)
+
+        train_rows = []
+        for row in rows:
+            counts = np.array([len(self.indices[name]) for name in SPLITS])
+            name = SPLITS[np.argmax(self.fractions * (row + 1) - counts)]
+            self.indices[name].append(row)
+            if name == 'train':
+                train_rows.append(row)
+
+        if train_rows:
+            for key in self.norm_params:
+                if key != 'xt':
+                    values = self.delta[train_rows] if key == 'xb' else self.outputs[key][train_rows]
+                    self.norm_params[key]['min'] = min(self.norm_params[key]['min'], float(values.min()))
+                    self.norm_params[key]['max'] = max(self.norm_params[key]['max'], float(values.max()))
+                    if key in self.moments:
+                        self.moments[key].update(values)
+
+        self.n_samples = rows.stop
+        return len(freqs)
+
+    def _store(self, rows):
+        """Transforms the rows that just arrived into the resident fields, allocated for the full capacity."""
+        new = {'xb': self.delta[rows.start:rows.stop, None],
+               **{key: self.outputs[key][rows.start:rows.stop] for key in self.output_keys}}
+        for key, values in new.items():
+            values = self.transform(values)
+            if key not in self.resident:
+                self.resident[key] = values.new_empty((self.capacity, *values.shape[1:]))
+            self.resident[key][rows.start:rows.stop] = values
+
+    def splits(self):
+        """
+        Returns:
+            tuple: (train, val, test) 'Subset's over the live index lists, so they grow with the dataset.
+        """
+        return tuple(torch.utils.data.Subset(self, self.indices[name]) for name in SPLITS)
+
+    def get_norm_params(self):
+        """Normalization parameters of the training rows received so far, in the format of 'get_norm_params'."""
+        params = {}
+        for key, method in self.norm_methods.items():
+            if method == 'standard':
+                params[key] = {'method': method, 'mean': float(self.moments[key].mean), 'std': self.moments[key].std}
+            else:
+                params[key] = {'method': method, **self.norm_params[key]}
+        return params
+
+    def finish(self, filename=None):
+        """
+        Waits for the producers to finish and optionally saves the complete dataset in the
+        format of 'DynamicFixedMaterialProblem.produce_samples', with rows in arrival order.
+        """
+        while not self.complete:
+            self.poll(block=True, timeout=60)
+        for process in self.producers:
+            process.join()
+        if filename:
+            g_u = self.data['g_u'][:self.n_samples].reshape(self.n_samples, len(self.r), len(self.z))
+            np.savez(filename, delta=self.delta[:self.n_samples], r=self.r, z=self.z, g_u=g_u.astype(self.problem.dtype, copy=False))
+            logger.info(f"Saved {self.n_samples} streamed samples at {filename}")
+
+    def __len__(self):
+        return self.n_samples
+
+    def __getitem__(self, idx):
+        return self.get_samples(idx)
+
+    def get_samples(self, idx, points=None):
+        """Samples 'idx' restricted to the trunk points 'points' (all points if None), as in 'DeepONetDataset'."""
+        if torch.is_tensor(idx):
+            idx = idx.tolist()
+
+        fields = self.resident if self.transform else {'xb': self.branch, **self.outputs}
+        branch_input = fields['xb'][idx]
+        trunk_input = self.get_trunk(points)
+        outputs = {key: fields[key][idx] for key in self.output_keys}
+        if points is not None:
+            points = torch.as_tensor(points, dtype=torch.long, device=branch_input.device) if self.transform else np.asarray(points)
+            outputs = {key: val[..., points] for key, val in outputs.items()}
+
+        return {'xb': branch_input, 'xt': trunk_input, **outputs, 'index': idx}
+
+    def get_trunk(self, points=None):
+        """Transformed trunk. The full trunk is built from the grid once; point subsets are generated per call."""
+        if points is not None:
+            trunk = self.grid.rows(points)
+            return self.transform(trunk) if self.transform else trunk
+        if self.trunk is None:
+            trunk = np.asarray(self.grid)
+            self.trunk = self.transform(trunk) if self.transform else trunk
+        return self.trunk
+
+    @property
+    def n_points(self):
+        return len(self.grid)
+
+    def get_grid(self):
+        return self.grid
@@ -196,6 +196,10 @@ class PODTrainingStrategy(TrainingStrategy):
 
         return model.branch_networks[i](xb_i).T
 
+    def get_batching(self):
+        # The POD basis is computed on every trunk point.
+        return True, False
+
     def forward(self, model, xb=None, xt=None):
         pod_basis = self.pod_basis
         return model.output_strategy.forward(model, data_branch=xb, data_trunk=pod_basis)
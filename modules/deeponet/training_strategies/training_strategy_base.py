@@ -34,6 +34,14 @@ class TrainingStrategy(ABC):
 
     def get_epochs(self, params):
         return [params['EPOCHS']]
+
+    def get_batching(self):
+        """
+        Returns:
+            tuple: Whether the (branch samples, trunk points) of the training batch can be split
+                   into mini-batches in the current phase.
+        """
+        return True, True
     
     def before_epoch(self, epoch, model, params):
         pass
@@ -21,6 +21,11 @@ class TwoStepTrainingStrategy(TrainingStrategy):
     def get_epochs(self, params):
             return [params['TRUNK_TRAIN_EPOCHS'], params['BRANCH_TRAIN_EPOCHS']]
 
+    def get_batching(self):
+        # A holds one column per training sample, so every step sees all of them. The trunk
+        # phase fits the trunk on subsets of points; the branch phase fits fixed matrices.
+        return False, self.current_phase == 'trunk'
+
     def update_training_phase(self, phase, **kwargs):
         self.current_phase = phase
         logger.info(f'Current phase: {self.current_phase}')
@@ -45,8 +45,9 @@ def inference(p: dict):
     processed_data = ppr.preprocess_npz_data(path_to_data, 
                                              config_model["INPUT_FUNCTION_KEYS"], 
                                              config_model["COORDINATE_KEYS"], 
-                                             direction=config_model["DIRECTION"] if config_model["PROBLEM"] == 'kelvin' else None)
-    dataset = DeepONetDataset(processed_data, transform=to_tensor_transform, output_keys=output_keys)
+                                             direction=config_model["DIRECTION"] if config_model["PROBLEM"] == 'kelvin' else None,
+                                             output_keys=output_keys)
+    dataset = DeepONetDataset(processed_data, transform=to_tensor_transform, output_keys=output_keys, upcast=to_tensor_transform)
     
     if p['INFERENCE_ON'] == 'train':
         indices_for_inference = config_model['TRAIN_INDICES']
@@ -69,26 +70,17 @@ def inference(p: dict):
         ground_truth[key] = inference_dataset[key]
     
     # Initialize normalization functions.
-    xb_scaler = ppr.Scaling(
-        min_val=config_model['NORMALIZATION_PARAMETERS']['xb']['min'],
-        max_val=config_model['NORMALIZATION_PARAMETERS']['xb']['max']
-    )
-    xt_scaler = ppr.Scaling(
-        min_val=config_model['NORMALIZATION_PARAMETERS']['xt']['min'],
-        max_val=config_model['NORMALIZATION_PARAMETERS']['xt']['max']
-    )
+    xb_scaler = ppr.Scaling.from_params(config_model['NORMALIZATION_PARAMETERS']['xb'])
+    xt_scaler = ppr.Scaling.from_params(config_model['NORMALIZATION_PARAMETERS']['xt'])
     output_scalers = {}
     for key in output_keys:
-        output_scalers[key] = ppr.Scaling(
-            min_val=config_model['NORMALIZATION_PARAMETERS'][key]['min'],
-            max_val=config_model['NORMALIZATION_PARAMETERS'][key]['max']
-        )
+        output_scalers[key] = ppr.Scaling.from_params(config_model['NORMALIZATION_PARAMETERS'][key])
     
     if config_model['INPUT_NORMALIZATION']:
-        xb = xb_scaler.normalize(xb)
-        xt = xt_scaler.normalize(xt)
+        xb = xb_scaler.scale(xb)
+        xt = xt_scaler.scale(xt)
     if config_model['OUTPUT_NORMALIZATION']:
-        ground_truth_norm = {key: output_scalers[key].normalize(ground_truth[key]) for key in output_keys}
+        ground_truth_norm = {key: output_scalers[key].scale(ground_truth[key]) for key in output_keys}
     
     if config_model['TRUNK_FEATURE_EXPANSION']:
         xt = ppr.trunk_feature_expansion(xt, config_model['TRUNK_EXPANSION_FEATURES_NUMBER'])
@@ -120,12 +112,12 @@ def inference(p: dict):
     if config_model['OUTPUT_NORMALIZATION']:
         preds_norm = {}
         for key in output_keys:
-            preds_norm[key] = output_scalers[key].normalize(preds[key])
+            preds_norm[key] = output_scalers[key].scale(preds[key])
         errors_norm = {}
         for key in output_keys:
             errors_norm[key] = evaluator(ground_truth_norm[key], preds_norm[key])
         for key in output_keys:
-            preds[key] = output_scalers[key].denormalize(preds_norm[key])
+            preds[key] = output_scalers[key].unscale(preds_norm[key])
         config_model['ERRORS_NORMED'] = errors_norm
     else:
         errors_norm = {}
@@ -141,4 +133,4 @@ def inference(p: dict):
     config_model['ERRORS_PHYSICAL'] = errors
     config_model['INFERENCE_TIME'] = inference_time
     
-    return model, preds, ground_truth, xt, xb, config_model
+    return model, preds, ground_truth, xt, xb, config_model, dataset.get_grid()
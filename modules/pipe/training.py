@@ -5,6 +5,12 @@ from tqdm.auto import tqdm
 logger = logging.getLogger(__name__)
 from .store_ouptuts import HistoryStorer
 from ..data_processing import preprocessing as ppr
+from ..data_processing.compose_transformations import (
+    BatchCompose,
+    BatchToTensor,
+    BatchScaling,
+    BatchTrunkFeatureExpansion
+)
 from ..plotting.plot_training import plot_training, align_epochs
 from ..deeponet.training_strategies import (
     StandardTrainingStrategy,
@@ -29,10 +35,40 @@ class TrainingLoop:
         self.saver = saver
         self.p = params
 
+        self.batch_cache = {}
+        self.pipeline = None
+        self.pipeline_norm_params = None
+
         self.training_strategy.prepare_training(self.model)
         self.optimizers = self.training_strategy.get_optimizers(self.model, self.p)
         self.schedulers = self.training_strategy.get_schedulers(self.optimizers, self.p)
 
+    def get_pipeline(self):
+        """
+        Returns the batch transform pipeline (tensor conversion, normalization and trunk feature expansion),
+        rebuilt when the normalization parameters are replaced.
+        """
+        norm_params = self.p['NORMALIZATION_PARAMETERS']
+        if self.pipeline is None or self.pipeline_norm_params is not norm_params:
+            dtype = getattr(torch, self.p['PRECISION'])
+            device = self.p['DEVICE']
+            keys = ['xb', 'xt', *self.p['OUTPUT_KEYS']]
+
+            scaled_keys = []
+            if self.p['INPUT_NORMALIZATION']:
+                scaled_keys += ['xb', 'xt']
+            if self.p['OUTPUT_NORMALIZATION']:
+                scaled_keys += self.p['OUTPUT_KEYS']
+            scalers = {key: ppr.Scaling.from_params(norm_params[key]) for key in scaled_keys}
+
+            transforms = [BatchToTensor(dtype=dtype, device=device), BatchScaling(scalers)]
+            if self.p['TRUNK_FEATURE_EXPANSION']:
+                transforms.append(BatchTrunkFeatureExpansion(self.p['TRUNK_EXPANSION_FEATURES_NUMBER']))
+
+            self.pipeline = BatchCompose(transforms, keys=keys)
+            self.pipeline_norm_params = norm_params
+        return self.pipeline
+
     def prepare_batch(self, batch):
         """
         Prepares the batch data, including normalization and feature expansion.
@@ -43,44 +79,47 @@ class TrainingLoop:
         Returns:
             dict: The processed batch data.
         """
-        processed_batch = {}
-        dtype = getattr(torch, self.p['PRECISION'])
-        device = self.p['DEVICE']
-
-        xb_scaler = ppr.Scaling(
-            min_val=self.p['NORMALIZATION_PARAMETERS']['xb']['min'],
-            max_val=self.p['NORMALIZATION_PARAMETERS']['xb']['max']
-        )
-        xt_scaler = ppr.Scaling(
-            min_val=self.p['NORMALIZATION_PARAMETERS']['xt']['min'],
-            max_val=self.p['NORMALIZATION_PARAMETERS']['xt']['max']
-        )
+        return self.get_pipeline()(batch)
+    
+    def get_processed_batch(self, name, batch):
+        """
+        Returns 'prepare_batch(batch)', reusing the result of the previous call with the same name
+        while neither the batch tensors nor the normalization parameters have been replaced.
 
-        if self.p['INPUT_NORMALIZATION']:
-            processed_batch['xb'] = xb_scaler.normalize(batch['xb']).to(dtype=dtype, device=device)
-            processed_batch['xt'] = xt_scaler.normalize(batch['xt']).to(dtype=dtype, device=device)
-        else:
-            processed_batch['xb'] = batch['xb'].to(dtype=dtype, device=device)
-            processed_batch['xt'] = batch['xt'].to(dtype=dtype, device=device)
+        Args:
+            name (str): Cache entry ('train' or 'val').
+            batch (dict): The batch data.
 
-        for key in self.p['OUTPUT_KEYS']:
-            scaler = ppr.Scaling(
-                min_val=self.p['NORMALIZATION_PARAMETERS'][key]['min'],
-                max_val=self.p['NORMALIZATION_PARAMETERS'][key]['max']
-            )
-            if self.p['OUTPUT_NORMALIZATION']:
-                processed_batch[key] = scaler.normalize(batch[key]).to(dtype=dtype, device=device)
-            else:
-                processed_batch[key] = batch[key].to(dtype=dtype, device=device)
+        Returns:
+            dict: The processed batch data.
+        """
+        # The key holds the objects themselves, so they can't be collected and their ids reused.
+        key = (self.p['NORMALIZATION_PARAMETERS'], *batch.keys(), *batch.values())
+        cached = self.batch_cache.get(name)
+        if cached is None or len(cached[0]) != len(key) or any(a is not b for a, b in zip(cached[0], key)):
+            self.batch_cache[name] = (key, self.prepare_batch(batch))
+        return self.batch_cache[name][1]
+
+    def train(self, train_batch, val_batch=None, sampler=None, loader=None, trunk=None):
+        """
+        Runs all training phases.
 
-        if self.p['TRUNK_FEATURE_EXPANSION']:
-            processed_batch['xt'] = ppr.trunk_feature_expansion(
-                processed_batch['xt'], self.p['TRUNK_EXPANSION_FEATURES_NUMBER']
-            )
+        Args:
+            train_batch (dict): Training batch ('xb', 'xt' and output keys). May be None when a
+                                'loader' splits the training samples, so no full batch is needed.
+            val_batch (dict or ShardedDeepONetDataset, optional): Validation batch, or batches whose
+                                                                 metrics are averaged.
+            sampler (callable, optional): Returns a fresh training batch. If given, it is called
+                                          at the start of every epoch after the first one.
+            loader (MiniBatchLoader, optional): If given, every epoch is a pass over its mini-batches,
+                                                split along the axes the training strategy allows.
+                                                Losses and errors are averaged over the pass.
+                                                Phases that split neither use the cached 'train_batch'.
+            trunk (Tensor, optional): Trunk passed (processed) to the training strategy when 'train_batch' is None.
 
-        return processed_batch
-    
-    def train(self, train_batch, val_batch=None):
+        Returns:
+            dict: Trained model information.
+        """
         epochs_per_phase = self.training_strategy.get_epochs(self.p)
         best_model_checkpoint = None
         best_val_loss = float('inf')
@@ -89,11 +128,16 @@ class TrainingLoop:
             phase_start_time = time.time()
 
             current_phase = self.training_strategy.phases[phase_index]
-            train_batch_processed = self.prepare_batch(train_batch)
+            self.batch_cache.clear()
+            if train_batch is not None:
+                trunk_processed = self.get_processed_batch('train', train_batch)['xt']
+            else:
+                # Constant field of the pipeline: transformed once and cached by identity.
+                trunk_processed = self.get_pipeline().transform('xt', trunk) if trunk is not None else None
             self.training_strategy.update_training_phase(current_phase)
             self.training_strategy.prepare_for_phase(self.model, 
                                                     model_params=self.p, 
-                                                    train_batch=train_batch_processed['xt'])
+                                                    train_batch=trunk_processed)
 
             logger.info(f"Starting phase: {current_phase}, Epochs: {phase_epochs}")
 
@@ -105,22 +149,36 @@ class TrainingLoop:
                               desc=f"Phase {current_phase}", 
                               colour=progress_bar_color):
 
-                train_batch_processed = self.prepare_batch(train_batch)
+                if sampler is not None and epoch > 0:
+                    train_batch = sampler()
+                rows, points = self.training_strategy.get_batching()
+                if loader is None or (not rows and not points and train_batch is not None):
+                    # Phases that split neither samples nor points train on the cached full batch.
+                    train_batch_processed = self.get_processed_batch('train', train_batch)
+                    trunk_processed = train_batch_processed['xt']
+                    batches = [train_batch_processed]
+                else:
+                    batches = loader.epoch(self.prepare_batch, rows, points)
+
+                batch_losses, batch_errors = [], []
+                for batch in batches:
+                    outputs = self.model(batch['xb'], batch['xt'])
+                    loss = self.training_strategy.compute_loss(outputs, batch, self.model, self.p)
 
-                outputs = self.model(train_batch_processed['xb'], train_batch_processed['xt'])
-                loss = self.training_strategy.compute_loss(outputs, train_batch_processed, self.model, self.p)
+                    self.training_strategy.zero_grad(self.optimizers)
+                    loss.backward()
 
-                self.training_strategy.zero_grad(self.optimizers)
-                loss.backward()
+                    # if epoch % 500 == 0:
+                    #     logger.info(f"\nLoss: {loss.item():.3E}\n")
 
-                # if epoch % 500 == 0:
-                #     logger.info(f"\nLoss: {loss.item():.3E}\n")
+                    self.training_strategy.step(self.optimizers)
 
-                self.training_strategy.step(self.optimizers)
+                    batch_losses.append(loss.item())
+                    batch_errors.append(self.training_strategy.compute_errors(outputs, batch, self.model, self.p))
 
-                errors = self.training_strategy.compute_errors(outputs, train_batch_processed, self.model, self.p)
+                errors = {key: sum(e[key] for e in batch_errors) / len(batch_errors) for key in batch_errors[0]}
 
-                self.storer.store_epoch_train_loss(current_phase, loss.item())
+                self.storer.store_epoch_train_loss(current_phase, sum(batch_losses) / len(batch_losses))
                 self.storer.store_epoch_train_errors(current_phase, errors)
                 self.storer.store_learning_rate(current_phase, self.optimizers[self.training_strategy.current_phase].param_groups[-1]['lr'])
 
@@ -158,7 +216,7 @@ class TrainingLoop:
                 
                 if epoch < self.p[self.training_strategy.current_phase.upper() + '_CHANGE_AT_EPOCH']:
                     self.training_strategy.step_schedulers(self.schedulers)
-                self.training_strategy.after_epoch(epoch, self.model, self.p, train_batch=train_batch_processed['xt'])
+                self.training_strategy.after_epoch(epoch, self.model, self.p, train_batch=trunk_processed)
 
             phase_end_time = time.time()
             phase_duration = phase_end_time - phase_start_time
@@ -168,15 +226,23 @@ class TrainingLoop:
 
     def _validate(self, val_batch):
         self.model.eval()
-        val_batch_processed = self.prepare_batch(val_batch)
+        if isinstance(val_batch, dict):
+            batches = [self.get_processed_batch('val', val_batch)]
+        else:
+            batches = val_batch.epoch(self.prepare_batch)
+
+        val_losses, val_errors = [], []
         with torch.no_grad():
-            val_outputs = self.model(val_batch_processed['xb'], val_batch_processed['xt'])
-            val_loss = self.training_strategy.compute_loss(val_outputs, val_batch_processed, self.model, self.p)
-            val_errors = self.training_strategy.compute_errors(val_outputs, val_batch_processed, self.model, self.p)
+            for val_batch_processed in batches:
+                val_outputs = self.model(val_batch_processed['xb'], val_batch_processed['xt'])
+                val_loss = self.training_strategy.compute_loss(val_outputs, val_batch_processed, self.model, self.p)
+                val_losses.append(val_loss.item())
+                val_errors.append(self.training_strategy.compute_errors(val_outputs, val_batch_processed, self.model, self.p))
 
-        val_metrics = {'val_loss': val_loss.item()}
+        val_metrics = {'val_loss': sum(val_losses) / len(val_losses)}
         for key in self.p['OUTPUT_KEYS']:
-            val_metrics[f"{key}"] = val_errors.get(key, None)
+            values = [errors[key] for errors in val_errors if errors.get(key) is not None]
+            val_metrics[f"{key}"] = sum(values) / len(values) if values else None
         return val_metrics
 
     def _log_epoch_metrics(self, epoch, train_loss, train_errors, val_metrics):
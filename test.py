@@ -31,7 +31,7 @@ def test_model(config_path: str, trained_model_config=None):
         config["MODELNAME"] = trained_model_name
         config["DATAFILE"] = trained_model_datafile
 
-    model, preds, ground_truth, trunk_features, branch_features, config_model = inference(config)
+    model, preds, ground_truth, trunk_features, branch_features, config_model, trunk_grid = inference(config)
     
     if trained_model_config:
         config_model['MODELNAME'] = trained_model_name
@@ -56,7 +56,8 @@ def test_model(config_path: str, trained_model_config=None):
                                                     branch_features=branch_features, 
                                                     trunk_features=trunk_features,
                                                     ground_truth=ground_truth,
-                                                    preds=preds)
+                                                    preds=preds,
+                                                    trunk_grid=trunk_grid)
 
     N, d = data_for_2D_plotting["branch_features"].shape
 
@@ -0,0 +1,73 @@
+import os
+import json
+import numpy as np
+from modules.data_generation.green_cache import GreenFunctionCache
+from modules.data_generation.data_generation_dynamic_fixed_material import dynamic_problem_from_params
+
+PARAMS = {'N': 4, 'N_R': 3, 'N_Z': 3,
+          'OMEGA_MAX': 5200, 'OMEGA_MIN': 0, 'LOAD': 6006663.0, 'Z_SOURCE': 0, 'L_SOURCE': 0, 'R_SOURCE': 2,
+          'R_MIN': 0, 'R_MAX': 20, 'Z_MIN': 0, 'Z_MAX': 20,
+          'COMPONENT': 1, 'LOADTYPE': 3, 'BVPTYPE': 2,
+          'E': 25E+09, 'NU': 0.242277267, 'DAMP': 0.01, 'DENS': 1735.1199}
+
+def make_problem(params=PARAMS, **kwargs):
+    problem = dynamic_problem_from_params(params, **kwargs)
+    problem.progress_bar = False
+    return problem
+
+def make_inputs():
+    np.random.seed(0)
+    problem = make_problem()
+    _, delta = problem._get_input_functions()
+    r, z = problem._get_coordinates()
+    return delta, r, z
+
+def test_serial_thread_and_process_generation_are_identical():
+    delta, r, z = make_inputs()
+    serial, _ = make_problem()._influencefunc(delta, r, z)
+    for pool in ('thread', 'process'):
+        parallel, _ = make_problem(workers=2, pool=pool)._influencefunc(delta, r, z)
+        assert np.array_equal(parallel, serial), pool
+
+def test_sharded_generation_resumes_missing_shards(tmp_path):
+    filename = str(tmp_path / 'data.npz')
+    np.random.seed(0)
+    make_problem(shard_size=3).produce_samples(filename)
+    with np.load(filename) as data:
+        expected = {key: data[key] for key in data.files}
+
+    # An interrupted run: the last shard was never written or recorded.
+    manifest_path = tmp_path / 'data_shards' / 'manifest.json'
+    manifest = json.loads(manifest_path.read_text())
+    manifest['completed'].remove(1)
+    manifest_path.write_text(json.dumps(manifest))
+    os.remove(tmp_path / 'data_shards' / 'shard_00001.npy')
+    os.remove(filename)
+
+    problem = make_problem(shard_size=3)
+    evaluated = []
+    influencefunc = problem._influencefunc
+    def counting_influencefunc(freqs, r, z):
+        evaluated.append(len(freqs))
+        return influencefunc(freqs, r, z)
+    problem._influencefunc = counting_influencefunc
+    np.random.seed(1)
+    problem.produce_samples(filename)
+
+    assert evaluated == [1]
+    with np.load(filename) as data:
+        for key, values in expected.items():
+            assert np.array_equal(data[key], values), key
+
+def test_cache_hits_for_the_same_nondimensional_inputs(tmp_path):
+    delta, r, z = make_inputs()
+    cache = GreenFunctionCache(str(tmp_path / 'green.sqlite'))
+    computed, _ = make_problem(cache=cache)._influencefunc(delta, r, z)
+    assert (cache.hits, cache.misses) == (0, computed.size)
+
+    # Scaling stiffness and density together leaves every nondimensional input unchanged.
+    scaled = dict(PARAMS, E=2 * PARAMS['E'], DENS=2 * PARAMS['DENS'])
+    cached, _ = make_problem(scaled, cache=cache)._influencefunc(delta, r, z)
+    assert (cache.hits, cache.misses) == (computed.size, computed.size)
+    assert np.array_equal(cached, computed)
+    cache.close()
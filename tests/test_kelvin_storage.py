@@ -0,0 +1,21 @@
+import numpy as np
+from modules.data_processing import preprocessing as ppr
+from modules.data_generation.data_generation_kelvin import KelvinsProblemDeterministic
+
+def produce(filename, storage):
+    np.random.seed(0)
+    problem = KelvinsProblemDeterministic((2, 3, 4, 5, 2, 6), (0.5, 3.0, 0.1, 0.45), (1.0, 100.0),
+                                          (0.01, 2.0, 0.01, 1.0, 0.1, 3.0), 'z', storage=storage)
+    problem.produce_samples(filename)
+    return ppr.preprocess_npz_data(filename, ['F', 'mu', 'nu'], ['x', 'y', 'z'], direction=2)
+
+def test_factorized_storage_rebuilds_the_full_displacements(tmp_path):
+    full = produce(str(tmp_path / 'full.npz'), 'full')
+    factorized = produce(str(tmp_path / 'factorized.npz'), 'factorized')
+
+    assert isinstance(factorized['g_u'], ppr.FactorizedField)
+    assert np.array_equal(factorized['xb'], full['xb'])
+    assert factorized['g_u'].shape == full['g_u'].shape
+    rows = [0, 5, 23]
+    assert np.allclose(factorized['g_u'][rows], full['g_u'][rows], rtol=1e-12, atol=0)
+    assert np.allclose(factorized['g_u'][np.arange(len(full['g_u']))], full['g_u'], rtol=1e-12, atol=0)
@@ -0,0 +1,66 @@
+import yaml
+import pytest
+import torch
+import numpy as np
+from modules.pipe.saving import Saver
+from modules.data_processing import preprocessing as ppr
+from modules.data_processing.deeponet_dataset import DeepONetDataset
+
+def make_reduced_dataset(tmp_path, dtype):
+    rng = np.random.default_rng(0)
+    npz_filename = str(tmp_path / 'data.npz')
+    np.savez(npz_filename,
+             F=np.linspace(1.0, 2.0, 3),
+             mu=np.linspace(10.0, 20.0, 2),
+             x=np.linspace(0.0, 1.0, 4),
+             z=np.linspace(-1.0, 1.0, 5),
+             g_u=rng.uniform(10.0, 100.0, size=(6, 20)))
+    directory = ppr.convert_npz_to_npy_dir(npz_filename, dtype=dtype)
+    output_keys = ['g_u']
+    data = ppr.preprocess_npz_data(directory, ['F', 'mu'], ['x', 'z'], output_keys=output_keys)
+    to_tensor = ppr.ToTensor(dtype=torch.float32, device='cpu')
+    return DeepONetDataset(data, transform=to_tensor, output_keys=output_keys, upcast=to_tensor)
+
+@pytest.mark.parametrize('method', ppr.NORMALIZATION_METHODS)
+@pytest.mark.parametrize('dtype', ['float16', 'float32'])
+def test_reduced_precision_norm_params_round_trip(tmp_path, dtype, method):
+    dataset = make_reduced_dataset(tmp_path, dtype)
+    params = ppr.get_norm_params(dataset, methods={key: method for key in ['xb', 'xt', 'g_u']})
+    saved = Saver('test').make_serializable(params)
+    loaded = yaml.safe_load(yaml.safe_dump(saved))
+    assert loaded == params
+
+    for key, values in loaded.items():
+        for name, value in values.items():
+            if name != 'method':
+                assert type(value) is float, (key, name, value)
+
+    g_u = dataset[list(range(len(dataset)))]['g_u']
+    expected = ppr.Scaling.from_params(params['g_u']).scale(g_u)
+    scaled = ppr.Scaling.from_params(loaded['g_u']).scale(g_u)
+    assert torch.equal(scaled, expected)
+
+def test_merged_moments_match_numpy():
+    values = np.random.default_rng(0).normal(3.0, 2.0, size=1000)
+    moments = ppr.RunningMoments()
+    for chunk in np.split(values, [1, 1, 250, 600]):
+        moments.update(chunk)
+    moments.update(torch.as_tensor(values[:0]))
+    assert moments.count == len(values)
+    assert np.isclose(moments.mean, np.mean(values), rtol=1e-12)
+    assert np.isclose(moments.std ** 2, np.var(values), rtol=1e-12)
+
+    grid = ppr.TrunkGrid([np.linspace(0.0, 1.0, 4), np.linspace(-2.0, 3.0, 5)])
+    grid_moments = ppr.RunningMoments()
+    grid_moments.update(grid)
+    assert np.isclose(grid_moments.mean, np.mean(np.asarray(grid)), rtol=1e-12)
+    assert np.isclose(grid_moments.std ** 2, np.var(np.asarray(grid)), rtol=1e-12)
+
+def test_chunked_norm_params_match_a_single_pass(tmp_path):
+    dataset = make_reduced_dataset(tmp_path, 'float32')
+    methods = {key: 'standard' for key in ['xb', 'xt', 'g_u']}
+    single = ppr.get_norm_params(dataset, methods=methods)
+    chunked = ppr.get_norm_params(dataset, methods=methods, chunk_size=4)
+    for key, values in single.items():
+        assert chunked[key]['mean'] == pytest.approx(values['mean'], rel=1e-12)
+        assert chunked[key]['std'] == pytest.approx(values['std'], rel=1e-12)
@@ -0,0 +1,21 @@
+import torch
+import pytest
+from modules.data_processing import preprocessing as ppr
+
+@pytest.mark.parametrize('dtype, tolerance', [(torch.float64, 1e-12), (torch.float32, 1e-5)])
+def test_recurrence_matches_sin_and_cos(dtype, tolerance):
+    p = 8
+    xt = torch.rand((50, 3), generator=torch.Generator().manual_seed(0), dtype=torch.float64) * 4 - 2
+    harmonics = [f(k * torch.pi * xt) for k in range(1, p + 1) for f in (torch.sin, torch.cos)]
+    expected = torch.concat([xt, *harmonics], axis=1)
+
+    features = ppr.TrunkFeatureExpansion(p)(xt.to(dtype))
+    assert features.shape == expected.shape
+    assert torch.allclose(features.double(), expected, rtol=0, atol=tolerance)
+
+def test_expansions_are_memoized_per_trunk():
+    xt = torch.rand((10, 2), dtype=torch.float64)
+    features = ppr.trunk_feature_expansion(xt, 3)
+    assert ppr.trunk_feature_expansion(xt, 3) is features
+    xt.add_(1.0)
+    assert ppr.trunk_feature_expansion(xt, 3) is not features
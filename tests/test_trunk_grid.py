@@ -0,0 +1,34 @@
+import torch
+import numpy as np
+from modules.data_processing import preprocessing as ppr
+from modules.data_processing.deeponet_dataset import DeepONetDataset
+
+AXES = [np.linspace(0.0, 1.0, 4), np.linspace(-2.0, 3.0, 5), np.array([0.5, 7.0])]
+
+def test_rows_blocks_and_reshape_match_meshgrid():
+    grid = ppr.TrunkGrid(AXES, names=['x', 'y', 'z'])
+    trunk = ppr.meshgrid_to_don(*AXES)
+    points = np.array([0, 7, 39, 13])
+
+    assert np.array_equal(np.asarray(grid), trunk)
+    assert np.array_equal(grid[points], trunk[points])
+    assert np.array_equal(grid[3:17:2], trunk[3:17:2])
+    assert np.array_equal(np.concatenate(list(grid.blocks(7))), trunk)
+    assert np.array_equal(grid.axis('y'), AXES[1])
+
+    values = np.random.default_rng(0).random((3, len(grid)))
+    assert np.array_equal(grid.reshape(values), values.reshape(3, 4, 5, 2))
+
+def test_point_subsets_leave_the_trunk_unbuilt():
+    grid = ppr.TrunkGrid(AXES, names=['x', 'y', 'z'])
+    g_u = np.random.default_rng(0).random((6, len(grid)))
+    to_tensor = ppr.ToTensor(dtype=torch.float64, device='cpu')
+    dataset = DeepONetDataset({'xb': np.arange(6.0)[:, None], 'xt': grid, 'g_u': g_u},
+                              transform=to_tensor, output_keys=['g_u'])
+    points = np.array([1, 5, 22])
+
+    samples = dataset.get_samples([4, 0], points)
+    assert dataset.trunk is None
+    assert torch.equal(samples['xt'], torch.as_tensor(ppr.meshgrid_to_don(*AXES)[points]))
+    assert torch.equal(samples['g_u'], torch.as_tensor(g_u[[4, 0]][:, points]))
+    assert dataset.get_trunk() is dataset.get_trunk()
@@ -2,14 +2,20 @@ import os
 import time
 import torch
 import logging
+import numpy as np
 
 from modules.pipe.saving import Saver
 from modules.utilities import dir_functions
 from modules.pipe.training import TrainingLoop
 from modules.pipe.model_factory import create_model
 from modules.data_processing import preprocessing as ppr
+from modules.data_processing.batching import MiniBatchLoader
 from modules.data_processing.compose_transformations import Compose
 from modules.data_processing.deeponet_dataset import DeepONetDataset
+from modules.data_processing.kelvin_dataset import KelvinAnalyticDataset
+from modules.data_processing.streaming_dataset import StreamingDynamicDataset
+from modules.data_processing.sharded_dataset import ShardedDeepONetDataset
+from modules.data_generation.data_generation_dynamic_fixed_material import dynamic_problem_from_params
 
 logger = logging.getLogger(__name__)
 
@@ -28,15 +34,61 @@ def train_model(config_path: str):
         to_tensor_transform
     ])
 
-    processed_data = ppr.preprocess_npz_data(p['DATAFILE'], 
-                                            p["INPUT_FUNCTION_KEYS"], 
-                                            p["COORDINATE_KEYS"],
-                                            direction=p["DIRECTION"] if p["PROBLEM"] == 'kelvin' else None)
-    dataset = DeepONetDataset(processed_data, 
-                            transformations, 
-                            output_keys=p['OUTPUT_KEYS'])
-
-    train_dataset, val_dataset, test_dataset = torch.utils.data.random_split(dataset, [p['TRAIN_PERC'], p['VAL_PERC'], p['TEST_PERC']])
+    on_the_fly = p.get('ON_THE_FLY_DATA', False)
+    streaming = p.get('STREAMING_DATA', False)
+    sharded = p.get('SHARDED_DATA', False)
+    if sharded and (on_the_fly or streaming):
+        raise ValueError("SHARDED_DATA reads DATAFILE and can't be combined with ON_THE_FLY_DATA or STREAMING_DATA.")
+    if sharded and p['TRAINING_STRATEGY'].lower() != 'standard':
+        raise ValueError("SHARDED_DATA requires the standard training strategy.")
+    norm_methods = {key: (p.get('NORMALIZATION_METHODS') or {}).get(key, p.get('NORMALIZATION_METHOD', 'minmax'))
+                    for key in ['xb', 'xt', *p['OUTPUT_KEYS']]}
+    if on_the_fly:
+        if p['PROBLEM'] != 'kelvin':
+            raise ValueError("ON_THE_FLY_DATA is only available for the 'kelvin' problem.")
+        data_params = dir_functions.load_params(p['DATA_GENERATION_CONFIG'])
+        dataset = KelvinAnalyticDataset(data_params,
+                                        direction=p['DIRECTION'],
+                                        dtype=getattr(torch, p['PRECISION']),
+                                        device=p['DEVICE'],
+                                        seed=p['SEED'],
+                                        resample_trunk=p.get('RESAMPLE_TRUNK', False))
+    elif streaming:
+        if p['PROBLEM'] != 'dynamic_fixed_material':
+            raise ValueError("STREAMING_DATA is only available for the 'dynamic_fixed_material' problem.")
+        if p['TRAINING_STRATEGY'].lower() != 'standard':
+            raise ValueError("STREAMING_DATA requires the standard training strategy.")
+        data_params = dir_functions.load_params(p['DATA_GENERATION_CONFIG'])
+        np.random.seed(data_params['SEED'])
+        problem = dynamic_problem_from_params(data_params, workers=p.get('STREAM_PRODUCER_WORKERS', 1), pool='thread')
+        dataset = StreamingDynamicDataset(problem,
+                                          output_keys=p['OUTPUT_KEYS'],
+                                          split=(p['TRAIN_PERC'], p['VAL_PERC'], p['TEST_PERC']),
+                                          transform=transformations,
+                                          producers=p.get('STREAM_PRODUCERS', 1),
+                                          chunk_size=p.get('STREAM_CHUNK_SIZE', 1),
+                                          queue_size=p.get('STREAM_QUEUE_SIZE', 8),
+                                          norm_methods=norm_methods)
+        if p.get('STREAM_TRAINER_THREADS'):
+            torch.set_num_threads(p['STREAM_TRAINER_THREADS'])
+        dataset.wait_for(p.get('STREAM_MIN_SAMPLES', 1))
+        logger.info(f"Starting training with {len(dataset)}/{dataset.capacity} samples")
+    else:
+        processed_data = ppr.preprocess_npz_data(p['DATAFILE'], 
+                                                p["INPUT_FUNCTION_KEYS"], 
+                                                p["COORDINATE_KEYS"],
+                                                direction=p["DIRECTION"] if p["PROBLEM"] == 'kelvin' else None,
+                                                output_keys=p['OUTPUT_KEYS'],
+                                                lazy=sharded)
+        dataset = DeepONetDataset(processed_data, 
+                                transformations, 
+                                output_keys=p['OUTPUT_KEYS'],
+                                upcast=to_tensor_transform)
+
+    if streaming:
+        train_dataset, val_dataset, test_dataset = dataset.splits()
+    else:
+        train_dataset, val_dataset, test_dataset = torch.utils.data.random_split(dataset, [p['TRAIN_PERC'], p['VAL_PERC'], p['TEST_PERC']])
 
     p['TRAIN_INDICES'] = train_dataset.indices
     p['VAL_INDICES'] = val_dataset.indices
@@ -46,45 +98,32 @@ def train_model(config_path: str):
 
     # ------------------------------ Setup data normalization functions ------------------------
 
-    norm_params = ppr.get_minmax_norm_params(train_dataset)
-
-    xb_min, xb_max = norm_params['xb']['min'], norm_params['xb']['max']
-    xt_min, xt_max = norm_params['xt']['min'], norm_params['xt']['max']
-
-    normalize_branch = ppr.Scaling(min_val=xb_min, max_val=xb_max)
-    normalize_trunk = ppr.Scaling(min_val=xt_min, max_val=xt_max)
-
-    normalization_parameters = {
-        "xb": {
-            "min": xb_min,
-            "max": xb_max,
-            "normalize": normalize_branch.normalize,
-            "denormalize": normalize_branch.denormalize
-        },
-        "xt": {
-            "min": xt_min,
-            "max": xt_max,
-            "normalize": normalize_trunk.normalize,
-            "denormalize": normalize_trunk.denormalize
-        }
-    }
-
-    for key in p['OUTPUT_KEYS']:
-        key_min, key_max = norm_params[key]['min'], norm_params[key]['max']
-        scaling = ppr.Scaling(min_val=key_min, max_val=key_max)
-        normalization_parameters[key] = {
-            "min": key_min,
-            "max": key_max,
-            "normalize": scaling.normalize,
-            "denormalize": scaling.denormalize
-        }
-
+    def get_normalization_parameters(norm_params):
+        normalization_parameters = {}
+        for key in ['xb', 'xt', *p['OUTPUT_KEYS']]:
+            params = {'method': 'minmax', **norm_params[key]}
+            scaling = ppr.Scaling.from_params(params)
+            normalization_parameters[key] = {
+                **params,
+                "normalize": scaling.scale,
+                "denormalize": scaling.unscale
+            }
+        return normalization_parameters
+
+    if streaming:
+        norm_params = dataset.get_norm_params()
+    else:
+        norm_params = ppr.get_norm_params(train_dataset,
+                                          methods=norm_methods,
+                                          chunk_size=p.get('NORMALIZATION_CHUNK_SIZE') or (p['SHARD_SIZE'] if sharded else None))
+    normalization_parameters = get_normalization_parameters(norm_params)
     p["NORMALIZATION_PARAMETERS"] = normalization_parameters
     # ------------------------------------ Initialize model -----------------------------
 
     model, model_name = create_model(
         model_params=p,
-        train_data=train_dataset[:]
+        # Only the POD and two-step strategies read the training data when they are created.
+        train_data=None if sharded or p['TRAINING_STRATEGY'].lower() == 'standard' else train_dataset[:]
     )
 
     # ---------------------------- Outputs folder --------------------------------
@@ -113,29 +152,101 @@ def train_model(config_path: str):
 
     # ---------------------------------- Batching data -------------------------------------
 
-    def get_single_batch(dataset, indices):
+    def get_single_batch(dataset, indices, points=None):
         dtype = getattr(torch, p['PRECISION'])
         device = p['DEVICE']
 
+        if hasattr(dataset, 'get_samples'):
+            # Trunk point subsets are generated from the dataset's grid instead of the full trunk.
+            samples = dataset.get_samples(list(indices), points)
+        else:
+            samples = dataset[list(indices)]
+            if points is not None:
+                samples = {**samples, 'xt': samples['xt'][points]}
+                samples.update({key: samples[key][:, points] for key in p['OUTPUT_KEYS']})
         batch = {}
-        batch['xb'] = torch.stack([dataset[idx]['xb'] for idx in indices], dim=0).to(dtype=dtype, device=device)
-        batch['xt'] = dataset.get_trunk()
+        batch['xb'] = torch.as_tensor(samples['xb']).to(dtype=dtype, device=device)
+        batch['xt'] = dataset.get_trunk() if points is None else torch.as_tensor(samples['xt']).to(dtype=dtype, device=device)
         for key in p['OUTPUT_KEYS']:
-            batch[key] = torch.stack([dataset[idx][key] for idx in indices], dim=0).to(dtype=dtype, device=device)
+            batch[key] = torch.as_tensor(samples[key]).to(dtype=dtype, device=device)
         return batch
 
-    train_batch = get_single_batch(dataset, train_dataset.indices)
-    val_batch = get_single_batch(dataset, val_dataset.indices) if p.get('VAL_PERC', 0) > 0 else None
+    mini_batching = p.get('MINI_BATCHING', False) and not sharded
+    # Mini-batches of rows never use the full training batch, so it isn't built: the training
+    # strategy only receives the trunk.
+    split_rows = mini_batching and training_strategy.get_batching()[0]
+
+    loader = None
+    if sharded:
+        def get_sharded_dataset(subset, shuffle):
+            return ShardedDeepONetDataset(dataset,
+                                          subset.indices,
+                                          batch_size=p['BATCH_SIZE'],
+                                          shard_size=p['SHARD_SIZE'],
+                                          read_ahead=p.get('SHARD_READ_AHEAD', 2),
+                                          seed=p['SEED'],
+                                          shuffle=shuffle)
+
+        train_batch = None
+        loader = get_sharded_dataset(train_dataset, shuffle=True)
+        val_batch = None
+        if p.get('VAL_PERC', 0) > 0:
+            val_batch = get_sharded_dataset(val_dataset, shuffle=False) if len(val_dataset) else {}
+        logger.info(f"Training on {len(loader)} batch(es) per epoch read in shards of {p['SHARD_SIZE']} samples")
+    else:
+        train_batch = None if split_rows else get_single_batch(dataset, train_dataset.indices)
+        val_batch = None
+        if p.get('VAL_PERC', 0) > 0:
+            val_batch = get_single_batch(dataset, val_dataset.indices) if len(val_dataset) else {}
+
+    if mini_batching:
+        loader = MiniBatchLoader(lambda rows, points: get_single_batch(dataset, rows, points),
+                                 train_dataset.indices,
+                                 n_trunk_points=dataset.n_points if hasattr(dataset, 'n_points') else len(dataset.get_trunk()),
+                                 batch_size=p['BATCH_SIZE'],
+                                 trunk_batch_size=p.get('TRUNK_BATCH_SIZE'),
+                                 seed=p['SEED'],
+                                 prefetch=p.get('PREFETCH_BATCHES', True))
+        logger.info(f"Training on {len(loader)} mini-batch(es) per epoch")
+
+    sampler = None
+    if on_the_fly and p.get('RESAMPLE_EVERY_EPOCH', False):
+        if p['TRAINING_STRATEGY'].lower() != 'standard':
+            logger.warning("Resampling is only supported by the standard training strategy. Training on a fixed draw.")
+        else:
+            def sampler():
+                dataset.resample()
+                return None if split_rows else get_single_batch(dataset, train_dataset.indices)
+    elif streaming:
+        def sampler():
+            nonlocal train_batch
+            if dataset.poll():
+                p["NORMALIZATION_PARAMETERS"] = get_normalization_parameters(dataset.get_norm_params())
+                if not split_rows:
+                    train_batch = get_single_batch(dataset, train_dataset.indices)
+                if val_batch is not None and len(val_dataset):
+                    # Updated in place: the training loop keeps a reference to the validation batch.
+                    val_batch.update(get_single_batch(dataset, val_dataset.indices))
+            return train_batch
 
     # ----------------------------------------- Train loop ---------------------------------
     start_time = time.time()
 
-    model_info = training_loop.train(train_batch, val_batch)
+    model_info = training_loop.train(train_batch, val_batch, sampler=sampler, loader=loader,
+                                     trunk=dataset.get_trunk() if train_batch is None else None)
 
     end_time = time.time()
     training_time = end_time - start_time
     logger.info(f"\n----------------------------------------Training concluded in: {training_time:.2f} seconds---------------------------\n")
 
+    if streaming:
+        logger.info(f"Training ended with {len(dataset)}/{dataset.capacity} samples generated. Waiting for the producers.")
+        dataset.finish(p['DATAFILE'])
+        saver(model_info=p, split_indices=p['TRAIN_INDICES'])
+    elif on_the_fly:
+        # The drawn samples are kept so the model can be tested from DATAFILE.
+        dataset.save(p['DATAFILE'])
+
     return model_info
 
 if __name__ == "__main__":